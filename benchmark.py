@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Offline scrape benchmark against a local stand-in for 1337x.
+
+Serves the recorded pages in fixtures/ from a local HTTP server with configurable
+latency, jitter and error rate, runs the scraper end to end and reports throughput,
+fetch latency percentiles and peak RSS.
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import main
+from main import Torrent1337x
+from throttle import AdaptiveThrottle
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SEARCH_PATH = re.compile(r'^/(?:sort-)?search/([^/]+)/(?:[^/]+/[^/]+/)?(\d+)/$')
+TORRENT_PATH = re.compile(r'^/torrent/(\d+)/[^/]*/?$')
+ROW = re.compile(r'<tr>\s*<td class="coll-1 name">.*?</tr>', re.S)
+TORRENT_ID = re.compile(r'/torrent/\d+/')
+LAST_PAGE = re.compile(r'(<li class="last"><a href="/search/[^/]+/)\d+/')
+INFOHASH = re.compile(r'3B245504CF5F11BBDBE1201CEA6A6BF45AEE1BC0', re.I)
+SEEDERS = re.compile(r'(<strong>Seeders</strong> <span class="seeds">)\d+')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureSite:
+    """Renders recorded 1337x pages with unique torrent IDs and infohashes."""
+
+    def __init__(self, total_pages=10, rows_per_page=20):
+        self.total_pages = total_pages
+        self.rows_per_page = rows_per_page
+        template = load_fixture('search_page.html')
+        self.rows = ROW.findall(template)
+        start = template.index(self.rows[0])
+        end = template.index(self.rows[-1]) + len(self.rows[-1])
+        self.search_head = LAST_PAGE.sub(rf'\g<1>{total_pages}/', template[:start])
+        self.search_tail = LAST_PAGE.sub(rf'\g<1>{total_pages}/', template[end:])
+        self.detail = load_fixture('torrent_page.html')
+
+    def search_page(self, page):
+        rows = []
+        for i in range(self.rows_per_page):
+            torrent_id = page * self.rows_per_page + i
+            row = self.rows[i % len(self.rows)]
+            rows.append(TORRENT_ID.sub(f'/torrent/{torrent_id}/', row))
+        return self.search_head + '\n'.join(rows) + self.search_tail
+
+    def detail_page(self, torrent_id):
+        infohash = hashlib.sha1(str(torrent_id).encode()).hexdigest().upper()
+        page = INFOHASH.sub(infohash, self.detail)
+        return SEEDERS.sub(rf'\g<1>{torrent_id % 500}', page)
+
+
+class FixtureServer:
+    """Local HTTP server for a FixtureSite, running in a background thread."""
+
+    def __init__(self, site, latency=0.0, jitter=0.0, error_rate=0.0, port=0):
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.requests += 1
+                delay = server.latency + random.uniform(-server.jitter, server.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+                if random.random() < server.error_rate:
+                    server.errors += 1
+                    self.send_error(503)
+                    return
+
+                search = SEARCH_PATH.match(self.path)
+                torrent = TORRENT_PATH.match(self.path)
+                if search:
+                    body = server.site.search_page(int(search.group(2)))
+                elif torrent:
+                    body = server.site.detail_page(int(torrent.group(1)))
+                else:
+                    self.send_error(404)
+                    return
+
+                content = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+
+class TimedTorrent1337x(Torrent1337x):
+    """Torrent1337x pointed at a local server that records every fetch latency."""
+
+    def __init__(self, base_url, parser='html.parser'):
+        super().__init__(parser=parser)
+        self.base_url = base_url
+        # Production traffic is HTTPS only; give plain HTTP the same retry policy
+        self.session.mount('http://', self.session.get_adapter('https://'))
+        self.latencies = []
+
+    def fetch(self, url, kind='detail'):
+        start = time.perf_counter()
+        try:
+            return super().fetch(url, kind)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def afetch(self, session, url, kind='detail', **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().afetch(session, url, kind, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_benchmark(args):
+    fixture_site = FixtureSite(total_pages=args.pages, rows_per_page=args.rows_per_page)
+    with FixtureServer(fixture_site, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                       error_rate=args.error_rate) as server:
+        site = TimedTorrent1337x(server.url, parser=args.parser)
+        if args.rate or args.adaptive:
+            site.throttle = AdaptiveThrottle(
+                rate=args.rate, adaptive=args.adaptive,
+                max_concurrency={'async': args.max_concurrency, 'pipeline': args.fetch_workers}.get(args.engine, args.workers))
+        start = time.perf_counter()
+        if args.engine == 'async':
+            results = asyncio.run(main.async_scrape_torrent_links(
+                site, query='benchmark', max_pages=args.pages, max_links_per_page=args.max_links,
+                max_concurrency=args.max_concurrency, per_host_concurrency=args.per_host_concurrency))
+        elif args.engine == 'pipeline':
+            results = main.pipeline_scrape_torrent_links(
+                site, query='benchmark', max_pages=args.pages, max_links_per_page=args.max_links,
+                fetch_workers=args.fetch_workers, parse_workers=args.parse_workers)
+        else:
+            results = main.scrape_torrent_links(
+                site, query='benchmark', max_pages=args.pages, max_links_per_page=args.max_links,
+                max_workers=args.workers)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'engine': args.engine,
+        'elapsed': elapsed,
+        'pages': len(site.latencies),
+        'records': len(results),
+        'server_requests': server.requests,
+        'server_errors': server.errors,
+        'pages_per_sec': len(site.latencies) / elapsed,
+        'records_per_sec': len(results) / elapsed,
+        'p50_latency_ms': percentile(site.latencies, 50) * 1000,
+        'p99_latency_ms': percentile(site.latencies, 99) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+        'throttle': site.throttle.stats() if site.throttle else None,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark")
+    parser.add_argument("--pages", type=int, default=10, help="Search result pages to serve and scrape")
+    parser.add_argument("--rows-per-page", type=int, default=20, help="Torrents listed per search page")
+    parser.add_argument("--max-links", type=int, default=None, help="Maximum number of links per page")
+    parser.add_argument("--latency", type=float, default=50.0, help="Server latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="Uniform latency jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--engine", choices=["threads", "async", "pipeline"], default="threads", help="Scrape engine to use")
+    parser.add_argument("--workers", type=int, default=5, help="Number of page worker threads (threads engine)")
+    parser.add_argument("--fetch-workers", type=int, default=8, help="Number of fetch threads (pipeline engine)")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Number of parse processes (pipeline engine, default: one per CPU)")
+    parser.add_argument("--max-concurrency", type=int, default=20, help="Maximum concurrent requests (async engine)")
+    parser.add_argument("--per-host-concurrency", type=int, default=8, help="Maximum concurrent requests per host (async engine)")
+    parser.add_argument("--rate", type=float, default=None, help="Maximum requests per second across all workers")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt concurrency to latency and 503 responses")
+    parser.add_argument("--parser", choices=main.PARSERS, default="html.parser", help="HTML parser backend")
+    args = parser.parse_args()
+
+    # Per-record log lines would dominate the measurement
+    logging.getLogger('main').setLevel(logging.WARNING)
+
+    report = run_benchmark(args)
+    print(
+        f"engine={report['engine']} elapsed={report['elapsed']:.2f}s "
+        f"pages={report['pages']} records={report['records']} "
+        f"server_requests={report['server_requests']} server_errors={report['server_errors']}\n"
+        f"pages/sec={report['pages_per_sec']:.1f} records/sec={report['records_per_sec']:.1f} "
+        f"p50={report['p50_latency_ms']:.1f}ms p99={report['p99_latency_ms']:.1f}ms "
+        f"peak_rss={report['peak_rss_mb']:.1f}MB"
+    )
+    if report['throttle']:
+        print(' '.join(f"{key}={value}" for key, value in report['throttle'].items()))
+
+
+if __name__ == "__main__":
+    main_cli()
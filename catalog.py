@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Local SQLite catalog of every torrent scraped across crawls.
+
+main.py --catalog upserts scraped torrents here; the query subcommand selects them by
+category, name, seeders, size and upload date without touching the network:
+
+    python catalog.py torrents.db query --category Movies --name 1080p \
+        --min-seeders 50 --max-size 4GB --since 30d
+
+The refresh subcommand re-scrapes only torrents whose seeder counts have gone stale.
+"""
+import argparse
+import calendar
+import csv
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+from records import CSV_FIELDNAMES, TorrentRecord, format_date, parse_size
+from torrent_index import torrent_key
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    'name', 'category', 'type', 'language', 'size_bytes', 'uploaded_by', 'downloads',
+    'checked_at', 'uploaded_at', 'seeders', 'leechers', 'magnet_link', 'infohash',
+)
+
+SORT_ORDERS = {
+    'seeders': 'seeders DESC',
+    'newest': 'uploaded_at DESC',
+    'largest': 'size_bytes DESC',
+    'smallest': 'size_bytes ASC',
+}
+
+AGE_UNITS = {'h': 3600, 'd': 86400, 'w': 7 * 86400, 'm': 30 * 86400, 'y': 365 * 86400}
+
+
+class TorrentCatalog:
+    """Torrents keyed by detail page ID, with typed, indexed columns.
+
+    Each upsert refreshes a torrent's counts and dates while keeping the time it was
+    first seen, so the catalog accumulates everything every crawl has found.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS torrents ('
+            'torrent_id TEXT PRIMARY KEY, url TEXT, name TEXT, category TEXT, type TEXT, language TEXT, '
+            'size_bytes INTEGER, uploaded_by TEXT, downloads INTEGER, checked_at REAL, uploaded_at REAL, '
+            'seeders INTEGER, leechers INTEGER, magnet_link TEXT, infohash TEXT, '
+            'first_seen REAL NOT NULL, scraped_at REAL NOT NULL)'
+        )
+        for column in ('infohash', 'category', 'seeders', 'size_bytes', 'uploaded_at', 'scraped_at'):
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS torrents_{column} ON torrents ({column})')
+        self.conn.commit()
+
+    def upsert(self, infos: Iterable[Dict], scraped_at: Optional[float] = None) -> int:
+        """Insert or refresh scraped info dicts; relative dates resolve against scraped_at."""
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        rows = []
+        for info in infos:
+            if not info.get('url'):
+                continue
+            record = TorrentRecord.from_info(info, scraped_at)
+            rows.append((torrent_key(info['url']), info['url'])
+                        + tuple(getattr(record, field) for field in FIELDS) + (scraped_at, scraped_at))
+        if not rows:
+            return 0
+        columns = ('torrent_id', 'url') + FIELDS + ('first_seen', 'scraped_at')
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns[1:] if column != 'first_seen')
+        with self.lock:
+            self.conn.executemany(
+                f'INSERT INTO torrents ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))}) '
+                f'ON CONFLICT (torrent_id) DO UPDATE SET {updates}',
+                rows
+            )
+            self.conn.commit()
+        return len(rows)
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        name: Optional[str] = None,
+        uploader: Optional[str] = None,
+        min_seeders: Optional[int] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        uploaded_since: Optional[float] = None,
+        scraped_before: Optional[float] = None,
+        sort: str = 'seeders',
+        limit: Optional[int] = None
+    ) -> Iterator[sqlite3.Row]:
+        """Yield matching rows, best first by sort; every condition is optional.
+
+        scraped_before selects torrents we last scraped before that time. It does not use
+        checked_at, the site's own "Last checked" stamp, which a refresh cannot move forward.
+        """
+        conditions, params = [], []
+        for clause, value in (
+            ('category = ? COLLATE NOCASE', category),
+            ('name LIKE ?', f'%{name}%' if name else None),
+            ('uploaded_by = ? COLLATE NOCASE', uploader),
+            ('seeders >= ?', min_seeders),
+            ('size_bytes >= ?', min_size),
+            ('size_bytes <= ?', max_size),
+            ('uploaded_at >= ?', uploaded_since),
+            ('scraped_at < ?', scraped_before),
+        ):
+            if value is not None:
+                conditions.append(clause)
+                params.append(value)
+        sql = 'SELECT * FROM torrents'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f' ORDER BY {SORT_ORDERS[sort]}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            yield from rows
+
+    def records(self, **filters) -> Iterator[TorrentRecord]:
+        for row in self.query(**filters):
+            yield TorrentRecord(**{field: row[field] for field in FIELDS})
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM torrents').fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+def parse_size_arg(text: str) -> int:
+    """'4GB' -> bytes; a bare number is taken as bytes."""
+    size = parse_size(text)
+    if size is None:
+        try:
+            return int(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid size: {text}")
+    return size
+
+
+def parse_since(text: str) -> float:
+    """'30d' (h, d, w, m or y) or an ISO date -> UTC epoch timestamp."""
+    unit = text[-1:].lower()
+    if unit in AGE_UNITS and text[:-1].isdigit():
+        return time.time() - int(text[:-1]) * AGE_UNITS[unit]
+    try:
+        return float(calendar.timegm(time.strptime(text, '%Y-%m-%d')))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid age or date: {text}")
+
+
+def add_query_arguments(parser: argparse.ArgumentParser, min_seeders: bool = True) -> None:
+    """Add the catalog filter options shared by catalog.py and download-from-csv.py."""
+    parser.add_argument("--category", default=None, help="Only this category, e.g. Movies")
+    parser.add_argument("--name", default=None, help="Only names containing this text, e.g. 1080p")
+    parser.add_argument("--uploader", default=None, help="Only torrents from this uploader")
+    if min_seeders:
+        parser.add_argument("--min-seeders", type=int, default=None, help="Only torrents with at least this many seeders")
+    parser.add_argument("--min-size", type=parse_size_arg, default=None, help="Minimum size, e.g. 700MB")
+    parser.add_argument("--max-size", type=parse_size_arg, default=None, help="Maximum size, e.g. 4GB")
+    parser.add_argument("--since", type=parse_since, default=None,
+                        help="Only torrents uploaded within this age (e.g. 30d, 12h) or since this date (YYYY-MM-DD)")
+    parser.add_argument("--sort", choices=sorted(SORT_ORDERS), default="seeders", help="Result order")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of torrents")
+
+
+def query_filters(args: argparse.Namespace) -> Dict:
+    return {
+        'category': args.category,
+        'name': args.name,
+        'uploader': args.uploader,
+        'min_seeders': args.min_seeders,
+        'min_size': args.min_size,
+        'max_size': args.max_size,
+        'uploaded_since': args.since,
+        'sort': args.sort,
+        'limit': args.limit,
+    }
+
+
+def refresh(site, catalog: TorrentCatalog, scraped_before: float, filters: Dict, max_workers: int = 5,
+            batch_size: int = 100) -> int:
+    """Re-scrape the detail pages of stale torrents and update them in place.
+
+    Only torrents last scraped before scraped_before are fetched; returns how many
+    were refreshed.
+    """
+    # main imports this module, so import the scraper only when refreshing
+    from main import refresh_torrent_infos
+
+    urls = [row['url'] for row in catalog.query(scraped_before=scraped_before, **filters) if row['url']]
+    logger.info(f"Refreshing {len(urls)} torrents last scraped before {format_date(scraped_before)}")
+    refreshed, batch = 0, []
+    for info in refresh_torrent_infos(site, urls, max_workers=max_workers):
+        batch.append(info)
+        if len(batch) >= batch_size:
+            refreshed += catalog.upsert(batch)
+            batch = []
+    refreshed += catalog.upsert(batch)
+    return refreshed
+
+
+def main():
+    # main imports this module, so the scraper is only imported once both are loaded
+    from main import SITES, add_site_arguments, make_site, open_cache
+
+    parser = argparse.ArgumentParser(description="Query the local torrent catalog written by main.py --catalog")
+    parser.add_argument("db", help="Catalog database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query_parser = commands.add_parser("query", help="List torrents matching filters")
+    add_query_arguments(query_parser)
+    query_parser.add_argument("--format", choices=["table", "csv", "magnets"], default="table",
+                              help="table for reading, csv for download-from-csv.py, magnets for one link per line")
+    refresh_parser = commands.add_parser("refresh", help="Re-scrape seeders and leechers of stale torrents")
+    refresh_parser.add_argument("--older-than", type=parse_since, default=parse_since("1d"),
+                                help="Refresh torrents last scraped longer ago than this age, e.g. 6h (default: 1d)")
+    refresh_parser.add_argument("--workers", type=int, default=5, help="Detail pages fetched in parallel")
+    refresh_parser.add_argument("--site", choices=sorted(SITES), default="1337x",
+                                help="Site the torrents were scraped from (default: 1337x)")
+    add_site_arguments(refresh_parser)
+    add_query_arguments(refresh_parser)
+    commands.add_parser("stats", help="Show catalog size")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    catalog = TorrentCatalog(args.db)
+    try:
+        if args.command == "stats":
+            print(f"{catalog.count()} torrents in {args.db}")
+            return
+        if args.command == "refresh":
+            # Same parser, throttle and cache setup as main.py, so a large refresh honours --rate
+            cache = open_cache(args)
+            try:
+                site = make_site(args.site, args, cache, max_concurrency=args.workers)
+                refreshed = refresh(site, catalog, args.older_than, query_filters(args),
+                                    max_workers=args.workers)
+            finally:
+                if cache:
+                    cache.close()
+            logger.info(f"Refreshed {refreshed} torrents")
+            return
+        records = catalog.records(**query_filters(args))
+        if args.format == "csv":
+            writer = csv.writer(sys.stdout)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(record.to_csv_row() for record in records)
+        elif args.format == "magnets":
+            for record in records:
+                print(record.magnet_link)
+        else:
+            for record in records:
+                print(f"{record.seeders:>6} {record.leechers:>6} {record.size:>10} "
+                      f"{format_date(record.uploaded_at)[:10]} {record.category:<10} {record.name}")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import logging
+from typing import Set
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlJournal:
+    """Append-only journal of completed search pages and detail URLs for one crawl.
+
+    Each line is a tab separated record: the query the crawl was started with, then one
+    `page` or `detail` line per completed unit of work. A torn final line left by a crash
+    is ignored when the journal is loaded.
+    """
+
+    def __init__(self, path: str, query: str):
+        self.path = path
+        self.query = query
+        self.pages: Set[int] = set()
+        self.details: Set[str] = set()
+        self._file = None
+
+    def open(self, resume: bool = False) -> 'CrawlJournal':
+        """Start a new journal, or load and extend the existing one when resuming."""
+        if resume and os.path.exists(self.path):
+            self._load()
+            self._file = open(self.path, 'a', encoding='utf-8')
+            logger.info(
+                f"Resuming crawl: {len(self.pages)} pages and {len(self.details)} torrents already done"
+            )
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(f"query\t{self.query}\n")
+            self._file.flush()
+        return self
+
+    def _load(self) -> None:
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                kind, _, value = line.rstrip('\n').partition('\t')
+                if kind == 'query' and value != self.query:
+                    raise ValueError(f"Journal {self.path} belongs to query {value!r}, not {self.query!r}")
+                elif kind == 'page':
+                    self.pages.add(int(value))
+                elif kind == 'detail':
+                    self.details.add(value)
+
+    def mark_page(self, page: int) -> None:
+        self.pages.add(page)
+        self._file.write(f"page\t{page}\n")
+
+    def mark_detail(self, url: str) -> None:
+        self.details.add(url)
+        self._file.write(f"detail\t{url}\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -1,13 +1,17 @@
 import csv
 import asyncio
 import logging
+import argparse
 from asyncio import Queue
 import aiofiles
 from concurrent.futures import ThreadPoolExecutor
-import subprocess
-from typing import List, Dict
-from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict
 from datetime import datetime
+from torrent_index import TorrentIndex
+from records import CSV_FIELDNAMES, TorrentRecord
+from catalog import TorrentCatalog, add_query_arguments, query_filters
+from qbit_submit import SubprocessSubmitter, make_submitter
+from metrics import METRICS, add_metrics_arguments, instrumented
 
 # Set up logging with a simpler format that doesn't try to access 'extra'
 logging.basicConfig(
@@ -17,128 +21,172 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
-class TorrentInfo:
-    category: str
-    type: str
-    language: str
-    size: str
-    uploaded_by: str
-    downloads: int
-    last_checked: str
-    date_uploaded: str
-    seeders: int
-    leechers: int
-    magnet_link: str
+CHUNK_SIZE = 1024 * 1024
+
+async def aiter_csv_rows(file, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[List[str]]:
+    """Parse CSV rows from an aiofiles file chunk by chunk.
+
+    Quoted fields may contain newlines, so a record only ends at a newline after an
+    even number of quote characters; only complete records are handed to csv.reader.
+    """
+    partial_line = ''
+    record: List[str] = []
+    quotes = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        lines = (partial_line + chunk).split('\n')
+        partial_line = lines.pop()
+        records = []
+        for line in lines:
+            record.append(line + '\n')
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                records.append(''.join(record))
+                record, quotes = [], 0
+        for row in csv.reader(records):
+            yield row
+    # The last record may not end with a newline
+    tail = ''.join(record) + partial_line
+    if tail.strip():
+        for row in csv.reader([tail]):
+            yield row
 
 class MagnetProcessor:
-    def __init__(self, batch_size: int = 5, max_concurrent: int = 3, min_seeders: int = 1):
+    def __init__(self, batch_size: int = 5, max_concurrent: int = 3, min_seeders: int = 1, index_path: str = None,
+                 submitter=None, queue_size: int = 1000):
         self.batch_size = batch_size
         self.max_concurrent = max_concurrent
         self.min_seeders = min_seeders
-        self.queue = Queue()
+        # Bounded so the reader waits for the workers instead of loading the whole file
+        self.queue = Queue(maxsize=queue_size)
         self.executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        # WebApiSubmitter adds a whole batch per request; SubprocessSubmitter launches qbittorrent per magnet
+        self.submitter = submitter or SubprocessSubmitter()
+        # Optional index of magnets already submitted by earlier runs
+        self.index = TorrentIndex(index_path) if index_path else None
         self.processed_count = 0
         self.skipped_count = 0
+        self.duplicate_count = 0
 
-    def _parse_csv_row(self, row: List[str]) -> TorrentInfo:
-        """Parse a CSV row into a TorrentInfo object"""
-        return TorrentInfo(
-            category=row[0],
-            type=row[1],
-            language=row[2],
-            size=row[3],
-            uploaded_by=row[4],
-            downloads=int(row[5]) if row[5].isdigit() else 0,
-            last_checked=row[6],
-            date_uploaded=row[7],
-            seeders=int(row[8]) if row[8].isdigit() else 0,
-            leechers=int(row[9]) if row[9].isdigit() else 0,
-            magnet_link=row[10]
-        )
+    def _parse_csv_row(self, row: List[str]) -> TorrentRecord:
+        """Parse a CSV row into a typed TorrentRecord"""
+        with METRICS.timer('parse', kind='csv'):
+            return TorrentRecord.from_csv_row(row)
+
+    async def submit(self, magnet_links: List[str]) -> List[str]:
+        """Submit magnets without blocking the event loop"""
+        if hasattr(self.submitter, 'submit_async'):
+            return await self.submitter.submit_async(magnet_links)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.submitter.submit, magnet_links)
 
-    async def download_magnet_batch(self, torrents: List[TorrentInfo]):
-        """Process a batch of magnet links concurrently"""
+    async def download_magnet_batch(self, torrents: List[TorrentRecord]):
+        """Filter a batch of torrents and submit the rest in one call"""
         try:
-            commands = []
+            accepted_torrents = []
             for torrent in torrents:
-                if torrent.seeders >= self.min_seeders:
-                    cmd = [
-                        'qbittorrent',
-                        '--skip-dialog=true',
-                        '--add-paused=true',
-                        torrent.magnet_link
-                    ]
-                    commands.append((cmd, torrent))
+                if self.index and self.index.has_submitted(torrent.magnet_link):
+                    self.duplicate_count += 1
+                    METRICS.inc('torrents', result='duplicate')
+                    logger.info(
+                        f"Skipping already submitted torrent: category={torrent.category}, "
+                        f"size={torrent.size}"
+                    )
+                elif torrent.seeders >= self.min_seeders:
+                    accepted_torrents.append(torrent)
                 else:
                     self.skipped_count += 1
+                    METRICS.inc('torrents', result='skipped')
                     logger.info(
                         f"Skipping torrent: category={torrent.category}, "
                         f"size={torrent.size}, seeders={torrent.seeders}"
                     )
+            if not accepted_torrents:
+                return
 
-            # Execute commands concurrently using ThreadPoolExecutor
-            tasks = []
-            for cmd, torrent in commands:
-                task = self.executor.submit(subprocess.run, cmd, check=True)
-                tasks.append((task, torrent))
-
-            # Wait for all tasks to complete
-            for task, torrent in tasks:
-                try:
-                    task.result()
+            added = set(await self.submit([t.magnet_link for t in accepted_torrents]))
+            if self.index:
+                self.index.mark_submitted(added)
+            for torrent in accepted_torrents:
+                if torrent.magnet_link in added:
                     self.processed_count += 1
+                    METRICS.inc('torrents', result='submitted')
                     logger.info(
                         f"Successfully added torrent: category={torrent.category}, "
                         f"size={torrent.size}, seeders={torrent.seeders}"
                     )
-                except subprocess.CalledProcessError as e:
+                else:
+                    METRICS.inc('torrents', result='failed')
                     logger.error(
                         f"Error adding torrent: category={torrent.category}, "
-                        f"size={torrent.size}, error={str(e)}"
+                        f"size={torrent.size}"
                     )
 
         except Exception as e:
             logger.error(f"Batch processing error: {e}")
 
+    async def next_batch(self):
+        """Wait for the next torrent, then take whatever else is already queued.
+
+        Returns the batch and whether the end-of-input sentinel was reached.
+        """
+        batch_size = self.batch_size if self.submitter.batched else 1
+        torrent = await self.queue.get()
+        if torrent is None:
+            return [], True
+        batch = [torrent]
+        while len(batch) < batch_size and not self.queue.empty():
+            torrent = self.queue.get_nowait()
+            if torrent is None:
+                return batch, True
+            batch.append(torrent)
+        return batch, False
+
     async def process_queue(self):
-        """Process magnet links from the queue in batches"""
-        while True:
-            batch = []
-            try:
-                # Collect up to batch_size items from the queue
-                for _ in range(self.batch_size):
-                    try:
-                        torrent = await asyncio.wait_for(self.queue.get(), timeout=0.5)
-                        batch.append(torrent)
-                    except asyncio.TimeoutError:
-                        break
-
-                if not batch:
-                    break
+        """Submit torrents from the queue until the reader's sentinel arrives.
 
-                await self.download_magnet_batch(batch)
+        Each batch (a single torrent for per-magnet backends) becomes its own task, with
+        at most max_concurrent submissions in flight, so one slow submission does not
+        hold back the others.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        tasks = set()
 
-            except Exception as e:
-                logger.error(f"Queue processing error: {e}")
+        async def run(batch):
+            try:
+                await self.download_magnet_batch(batch)
             finally:
-                # Mark tasks as done
-                for _ in range(len(batch)):
-                    self.queue.task_done()
+                semaphore.release()
+
+        done = False
+        while not done:
+            batch, done = await self.next_batch()
+            if batch:
+                await semaphore.acquire()
+                task = asyncio.create_task(run(batch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
 
     async def read_csv(self, csv_file: str):
-        """Read magnet links from CSV file asynchronously"""
+        """Stream magnet links from a CSV file into the queue"""
         try:
-            async with aiofiles.open(csv_file, mode='r', encoding='utf-8') as file:
-                content = await file.read()
-                reader = csv.reader(content.splitlines())
-                header = next(reader, None)  # Skip header
+            async with aiofiles.open(csv_file, mode='r', encoding='utf-8', newline='') as file:
+                rows = aiter_csv_rows(file)
+                # Skip header; the anext() builtin needs Python 3.10
+                try:
+                    header = await rows.__anext__()
+                except StopAsyncIteration:
+                    header = None
 
-                if not header or len(header) != 11:
+                # Batch crawls append a Queries column, which is not needed here
+                if not header or len(header) < len(CSV_FIELDNAMES):
                     raise ValueError("Invalid CSV format")
 
-                for row in reader:
-                    if len(row) == 11:  # Ensure row has all required fields
+                async for row in rows:
+                    if len(row) == len(header):  # Ensure row has all required fields
                         try:
                             torrent_info = self._parse_csv_row(row)
                             await self.queue.put(torrent_info)
@@ -151,43 +199,101 @@ class MagnetProcessor:
             logger.error(f"File {csv_file} not found")
         except Exception as e:
             logger.error(f"Error reading CSV: {e}")
+        finally:
+            # Tell process_queue there is nothing more to come
+            await self.queue.put(None)
 
-    async def process_file(self, csv_file: str):
-        """Main processing function"""
+    async def read_catalog(self, catalog_path: str, filters: Dict):
+        """Stream torrents matching a catalog query into the queue"""
+        catalog = None
+        try:
+            catalog = TorrentCatalog(catalog_path)
+            records = catalog.records(**filters)
+            loop = asyncio.get_running_loop()
+            while True:
+                # Rows are fetched in chunks off the event loop
+                record = await loop.run_in_executor(self.executor, next, records, None)
+                if record is None:
+                    break
+                await self.queue.put(record)
+        except Exception as e:
+            logger.error(f"Error querying catalog {catalog_path}: {e}")
+        finally:
+            if catalog:
+                catalog.close()
+            await self.queue.put(None)
+
+    async def process_file(self, csv_file: str = None, catalog: str = None, filters: Dict = None):
+        """Main processing function; reads torrents from a CSV file or a catalog query"""
         start_time = datetime.now()
 
-        # Start CSV reading and queue processing concurrently
-        await asyncio.gather(
-            self.read_csv(csv_file),
-            *(self.process_queue() for _ in range(self.max_concurrent))
-        )
+        if catalog:
+            reader = self.read_catalog(catalog, filters or {})
+        else:
+            reader = self.read_csv(csv_file)
+        # Start reading and queue processing concurrently
+        await asyncio.gather(reader, self.process_queue())
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
 
         logger.info(
             f"Processing completed - Processed: {self.processed_count}, "
-            f"Skipped: {self.skipped_count}, Duration: {duration:.2f} seconds"
+            f"Skipped: {self.skipped_count}, Already submitted: {self.duplicate_count}, "
+            f"Duration: {duration:.2f} seconds"
         )
 
 def main():
-    csv_file = 'results.csv'
+    parser = argparse.ArgumentParser(description="Add torrents from a scraper CSV to qBittorrent")
+    parser.add_argument("csv_file", nargs="?", default="results.csv", help="CSV file written by main.py")
+    parser.add_argument("--catalog", default=None,
+                        help="Read torrents matching the query options below from this catalog instead of a CSV")
+    parser.add_argument("--batch-size", type=int, default=15, help="Torrents submitted per batch")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Concurrent submission workers")
+    parser.add_argument("--min-seeders", type=int, default=5, help="Only process torrents with at least this many seeders")
+    parser.add_argument("--queue-size", type=int, default=1000, help="Maximum torrents read ahead of the workers")
+    parser.add_argument("--index", default=None, help="Path of an SQLite index of already submitted magnets to skip")
+    parser.add_argument("--backend", choices=["webapi", "subprocess"], default="webapi",
+                        help="Add torrents through the qBittorrent Web API or by launching qbittorrent")
+    parser.add_argument("--host", action="append", default=None,
+                        help="qBittorrent Web UI host, optionally user:password@host; repeat to spread torrents "
+                             "over several instances (webapi backend, default: localhost:8081)")
+    parser.add_argument("--username", default="admin", help="qBittorrent Web UI username")
+    parser.add_argument("--password", default="adminadmin", help="qBittorrent Web UI password")
+    add_query_arguments(parser.add_argument_group("catalog query"), min_seeders=False)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    submitter = make_submitter(args.backend, args.host or ["localhost:8081"], args.username, args.password)
+
     processor = MagnetProcessor(
-        batch_size=15,
-        max_concurrent=8,
-        min_seeders=5  # Only process torrents with at least 5 seeders
+        batch_size=args.batch_size,
+        max_concurrent=args.max_concurrent,
+        min_seeders=args.min_seeders,
+        index_path=args.index,
+        submitter=submitter,
+        queue_size=args.queue_size
     )
 
     # Run the async process
     try:
-        asyncio.run(processor.process_file(csv_file))
+        filters = dict(query_filters(args), min_seeders=args.min_seeders)
+        with instrumented(args):
+            try:
+                asyncio.run(processor.process_file(args.csv_file, catalog=args.catalog, filters=filters))
+            finally:
+                # Join the submit threads inside the block so --profile includes them
+                processor.executor.shutdown()
+                if hasattr(processor.submitter, 'close'):
+                    processor.submitter.close()
     except KeyboardInterrupt:
         logger.info("Process interrupted by user")
     except Exception as e:
         logger.error(f"Process failed: {e}")
     finally:
         # Clean up
-        processor.executor.shutdown()
+        if processor.index:
+            processor.index.close()
 
 if __name__ == "__main__":
     main()
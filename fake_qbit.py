@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Local stand-in for the qBittorrent Web API.
+
+Implements the endpoints the scraper, the CSV processor and the rate limiter use
+(login, sync/maindata deltas, torrents/info, add, pause and resume) on top of an
+in-memory torrent table, with configurable latency. Run several on different ports
+to exercise fleet management without real clients.
+"""
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from torrent_index import parse_infohash
+
+logger = logging.getLogger(__name__)
+
+STATES = ['downloading', 'stalledDL', 'pausedDL', 'uploading']
+INCOMPLETE_STATES = ['downloading', 'stalledDL', 'metaDL', 'pausedDL', 'queuedDL', 'checkingDL', 'forcedDL']
+
+
+def parse_form(content_type, body):
+    """Decode a urlencoded or multipart/form-data request body into a dict."""
+    if content_type.startswith('multipart/form-data'):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + body
+        )
+        return {
+            part.get_param('name', header='content-disposition'): part.get_content().strip()
+            for part in message.iter_parts()
+        }
+    return dict(urllib.parse.parse_qsl(body.decode()))
+
+
+class FakeQBittorrent:
+    """In-memory qBittorrent Web API served from a background thread."""
+
+    def __init__(self, torrents=50, latency=0.0, free_space=10 ** 12, download_rate=5000, port=0, seed=None):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.rid = 0
+        self.torrents = {}
+        self.changed = {}
+        self.server_state = {'free_space_on_disk': free_space, 'dl_info_speed': download_rate}
+        self.calls = {'maindata': 0, 'info': 0, 'pause': 0, 'resume': 0, 'add': 0}
+        rng = random.Random(seed)
+        for i in range(torrents):
+            torrent_hash = hashlib.sha1(f'{port}-{i}'.encode()).hexdigest()
+            size = (i + 1) * 10 ** 8
+            progress = round(rng.random() * 0.9, 2)
+            self._update(torrent_hash, {
+                'name': f'torrent {i}', 'added_on': 1000 + i, 'progress': progress, 'size': size,
+                'amount_left': int(size * (1 - progress)), 'state': rng.choice(STATES),
+                'num_seeds': i % 7, 'num_leechs': i % 3, 'dlspeed': 1000,
+            })
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.host = f'127.0.0.1:{self.httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _update(self, torrent_hash, fields):
+        """Apply field changes and remember the rid at which each field changed."""
+        self.rid += 1
+        self.torrents.setdefault(torrent_hash, {}).update(fields)
+        for key in fields:
+            self.changed.setdefault(torrent_hash, {})[key] = self.rid
+
+    def maindata(self, rid):
+        self.calls['maindata'] += 1
+        if rid == 0 or rid > self.rid:
+            return {
+                'rid': self.rid, 'full_update': True, 'server_state': dict(self.server_state),
+                'torrents': {h: dict(t) for h, t in self.torrents.items()},
+            }
+        torrents = {}
+        for torrent_hash, fields in self.changed.items():
+            delta = {key: self.torrents[torrent_hash][key] for key, changed_at in fields.items() if changed_at > rid}
+            if delta:
+                torrents[torrent_hash] = delta
+        return {'rid': self.rid, 'torrents': torrents, 'server_state': dict(self.server_state)}
+
+    def info(self, status_filter=None):
+        self.calls['info'] += 1
+        torrents = [dict(t, hash=h) for h, t in self.torrents.items()]
+        if status_filter == 'downloading':
+            torrents = [t for t in torrents if t.get('state') in INCOMPLETE_STATES]
+        return torrents
+
+    def set_state(self, action, hashes):
+        self.calls[action] += 1
+        selected = list(self.torrents) if hashes == 'all' else hashes.split('|')
+        state = 'pausedDL' if action == 'pause' else 'downloading'
+        for torrent_hash in selected:
+            torrent = self.torrents.get(torrent_hash)
+            if torrent and torrent.get('state') in INCOMPLETE_STATES and torrent['state'] != state:
+                self._update(torrent_hash, {'state': state})
+
+    def add(self, urls, paused):
+        self.calls['add'] += 1
+        added = 0
+        for url in urls.split('\n'):
+            torrent_hash = parse_infohash(url.strip())
+            if not torrent_hash or torrent_hash in self.torrents:
+                continue
+            # Metadata is not known yet, like a freshly added magnet
+            self._update(torrent_hash, {
+                'name': torrent_hash, 'added_on': int(time.time()), 'progress': 0.0, 'size': 0,
+                'amount_left': 0, 'state': 'pausedDL' if paused else 'metaDL',
+                'num_seeds': 0, 'num_leechs': 0, 'dlspeed': 0,
+            })
+            added += 1
+        return 'Ok.' if added else 'Fails.'
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.route()
+
+            def do_POST(self):
+                self.route()
+
+            def reply(self, body, content_type='text/plain'):
+                content = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Set-Cookie', 'SID=fake; path=/')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def route(self):
+                if server.latency > 0:
+                    time.sleep(server.latency)
+                url = urllib.parse.urlparse(self.path)
+                params = dict(urllib.parse.parse_qsl(url.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    params.update(parse_form(self.headers.get('Content-Type', ''), self.rfile.read(length)))
+
+                with server.lock:
+                    if url.path == '/api/v2/auth/login':
+                        return self.reply('Ok.')
+                    if url.path == '/api/v2/app/version':
+                        return self.reply('v4.6.5')
+                    if url.path == '/api/v2/app/webapiVersion':
+                        return self.reply('2.9.3')
+                    if url.path == '/api/v2/sync/maindata':
+                        return self.reply(json.dumps(server.maindata(int(params.get('rid', 0)))), 'application/json')
+                    if url.path == '/api/v2/torrents/info':
+                        return self.reply(json.dumps(server.info(params.get('filter'))), 'application/json')
+                    if url.path in ('/api/v2/torrents/pause', '/api/v2/torrents/resume'):
+                        server.set_state(url.path.rsplit('/', 1)[1], params.get('hashes', ''))
+                        return self.reply('')
+                    if url.path == '/api/v2/torrents/add':
+                        return self.reply(server.add(params.get('urls', ''), params.get('paused') == 'true'))
+                    if url.path == '/fake/calls':
+                        return self.reply(json.dumps(server.calls), 'application/json')
+                self.send_error(404)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake qBittorrent Web API server for local testing")
+    parser.add_argument("--port", type=int, default=8081, help="Port to listen on")
+    parser.add_argument("--torrents", type=int, default=50, help="Number of torrents to start with")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay in ms before every response")
+    parser.add_argument("--free-space", type=float, default=1000.0, help="Reported free disk space in GB")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the initial torrent table")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    fake = FakeQBittorrent(torrents=args.torrents, latency=args.latency / 1000,
+                           free_space=int(args.free_space * 1024 ** 3), port=args.port, seed=args.seed)
+    logger.info(f"Fake qBittorrent Web API listening on http://{fake.host} (login with any credentials)")
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
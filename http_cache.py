@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+import logging
+from collections import namedtuple
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached page is served without contacting the site, per page kind
+DEFAULT_TTLS = {
+    'search': 10 * 60,
+    'detail': 7 * 24 * 60 * 60,
+}
+
+CacheEntry = namedtuple('CacheEntry', ['body', 'etag', 'last_modified', 'fetched_at', 'fresh'])
+
+
+class ResponseCache:
+    """Persistent SQLite cache of response bodies keyed by URL.
+
+    Entries younger than the TTL for their page kind are served directly. Stale entries
+    are revalidated with If-None-Match/If-Modified-Since, and the least recently used
+    entries are evicted once the stored bodies exceed max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, '
+            'fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self.conn.commit()
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url: str, kind: str = 'detail') -> Optional[CacheEntry]:
+        """Return the cached entry for url, marking whether it is still fresh for kind."""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            fresh = now - row[3] < self.ttls.get(kind, 0)
+            if fresh:
+                self.hits += 1
+                self.conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+                self.conn.commit()
+        return CacheEntry(*row, fresh=fresh)
+
+    @staticmethod
+    def validators(entry: CacheEntry) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry."""
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def mark_revalidated(self, url: str) -> None:
+        """Restart the TTL of an entry after the site answered 304 Not Modified."""
+        now = time.time()
+        with self.lock:
+            self.revalidated += 1
+            self.conn.execute(
+                'UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url)
+            )
+            self.conn.commit()
+
+    def store(self, url: str, body: bytes, headers) -> None:
+        """Store a freshly downloaded body along with its validators."""
+        now = time.time()
+        with self.lock:
+            self.misses += 1
+            old = self.conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, body, etag, last_modified, fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, headers.get('ETag'), headers.get('Last-Modified'), now, now, len(body))
+            )
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        rows = self.conn.execute('SELECT url, size FROM responses ORDER BY accessed_at')
+        doomed = []
+        for url, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            doomed.append((url,))
+            self.total_bytes -= size
+        self.conn.executemany('DELETE FROM responses WHERE url = ?', doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self.total_bytes,
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -1,55 +1,294 @@
 from abc import ABC, abstractmethod  # To define abstract methods
+import asyncio
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
-import subprocess
 import concurrent.futures
 from functools import partial
 import logging
 import argparse
 import csv
+import os
+import queue
+import threading
+import time
 from tqdm import tqdm
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
+from http_cache import ResponseCache
+from crawl_state import CrawlJournal
+from torrent_index import TorrentIndex, parse_infohash
+from qbit_submit import SubmissionBuffer, make_submitter
+from throttle import AdaptiveThrottle, THROTTLE_STATUSES, retry_after_seconds
+from catalog import TorrentCatalog, parse_size_arg
+from metrics import METRICS, add_metrics_arguments, instrumented
+from records import (CSV_FIELDNAMES, Listing, ListingFilter, RecordColumns, TorrentRecord, parse_count, parse_date,
+                     parse_size, require_pyarrow)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
-def get_value_by_label(items, label):
-        for item in items:
-            strong = item.find('strong')
-            if strong and strong.text.strip() == label:
-                span = item.find('span')
-                if span:
-                    # Handle special case for Uploaded By which contains nested elements
-                    if label == 'Uploaded By':
-                        link = span.find('a')
-                        return link.text.strip() if link else 'N/A'
-                    return span.text.strip()
-        return 'N/A'
+
+class CountingRetry(Retry):
+    """urllib3 Retry that counts each retry it grants in METRICS.
+
+    Retried 5xx responses are labelled server_error, as in Site.afetch(), and only
+    connection and read errors count as transport.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, *args, **kwargs):
+        # Raises once retries are exhausted, so only granted retries are counted
+        retry = super().increment(method, url, response, error, *args, **kwargs)
+        METRICS.inc('retries', reason='transport' if error is not None else 'server_error')
+        return retry
+
+# Status codes retried by both the requests session and the async engine. Throttling
+# responses (429/503) are retried by Site itself so the shared throttle can see them.
+RETRY_STATUSES = [500, 502, 504]
+THROTTLE_RETRIES = 5
+THROTTLE_BACKOFF = 1.0
+
+# BeautifulSoup tree builders accepted by --parser; lxml is much faster but optional
+PARSERS = ['html.parser', 'lxml']
+
+# Detail page labels and the info keys they are stored under
+TORRENT_INFO_LABELS = {
+    'Category': 'category',
+    'Type': 'type',
+    'Language': 'language',
+    'Total size': 'size',
+    'Uploaded By': 'uploaded_by',
+    'Downloads': 'downloads',
+    'Last checked': 'last_checked',
+    'Date uploaded': 'date_uploaded',
+    'Seeders': 'seeders',
+    'Leechers': 'leechers',
+}
+
+# Batch crawls add the queries that found each torrent, joined by |
+BATCH_FIELDNAMES = CSV_FIELDNAMES + ['Queries']
+# Federated searches add the sites that listed each torrent, joined by |
+FEDERATED_FIELDNAMES = CSV_FIELDNAMES + ['Sources']
+
+# Category icons on 1337x search listings; icons shared by several categories (HD is
+# used for both movies and TV) are left out so the detail page decides
+LISTING_CATEGORIES = {
+    'flaticon-apps': 'Apps',
+    'flaticon-ebook': 'Other',
+    'flaticon-games': 'Games',
+    'flaticon-music': 'Music',
+    'flaticon-mp3': 'Music',
+    'flaticon-tv': 'TV',
+    'flaticon-movie': 'Movies',
+    'flaticon-anime': 'Anime',
+    'flaticon-xxx': 'XXX',
+}
+
+def get_values_by_label(items):
+    """Map each <strong> label to its <span> value in one pass; the first match wins."""
+    values = {}
+    for item in items:
+        strong = item.find('strong')
+        if not strong:
+            continue
+        label = strong.text.strip()
+        if label in values:
+            continue
+        span = item.find('span')
+        if span:
+            # Handle special case for Uploaded By which contains nested elements
+            if label == 'Uploaded By':
+                link = span.find('a')
+                values[label] = link.text.strip() if link else 'N/A'
+            else:
+                values[label] = span.text.strip()
+    return values
+
 # Base Site class
 class Site(ABC):  # Abstract Base Class (ABC)
-    def __init__(self, base_url, headers):
+    def __init__(self, base_url, headers, parser='html.parser'):
         self.base_url = base_url
         self.headers = headers
+        self.parser = parser
         self.session = requests.Session()
-        retries = Retry(total=5, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504])
+        retries = CountingRetry(total=5, backoff_factor=0.1, status_forcelist=RETRY_STATUSES)
         self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        self.cache = None  # Optional http_cache.ResponseCache
+        self.throttle = None  # Optional throttle.AdaptiveThrottle shared by all workers
+        self.timeout = None  # Optional per-request timeout in seconds
+        self.stopped = False  # Set to make every further fetch fail fast, e.g. on a deadline
+
+    def fetch(self, url, kind='detail'):
+        """Return the raw body of url, served from self.cache when possible."""
+        if self.stopped:
+            return None
+        entry = self.cache.get(url, kind) if self.cache else None
+        if entry and entry.fresh:
+            METRICS.inc('cache', result='hit')
+            return entry.body
+        headers = dict(self.headers, **self.cache.validators(entry)) if entry else self.headers
+        for attempt in range(THROTTLE_RETRIES + 1):
+            if self.throttle:
+                self.throttle.acquire()
+            start = time.monotonic()
+            status = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                status = response.status_code
+            except requests.RequestException as e:
+                logger.error(f"Error fetching {url}: {e}")
+                METRICS.inc('fetch_errors', kind=kind)
+                return None
+            finally:
+                elapsed = time.monotonic() - start
+                METRICS.observe('fetch', elapsed, kind=kind)
+                if self.throttle:
+                    self.throttle.release(status, elapsed)
+            if status in THROTTLE_STATUSES and attempt < THROTTLE_RETRIES:
+                delay = retry_after_seconds(response.headers) or THROTTLE_BACKOFF * (2 ** attempt)
+                logger.warning(f"Throttled by {url} (HTTP {status}), retrying in {delay:.1f}s")
+                METRICS.inc('retries', reason='throttled')
+                if self.throttle:
+                    self.throttle.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            break
 
-    def get(self, url):
         try:
-            response = self.session.get(url, headers=self.headers)
+            if entry and response.status_code == 304:
+                self.cache.mark_revalidated(url)
+                METRICS.inc('cache', result='revalidated')
+                return entry.body
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            if self.cache:
+                METRICS.inc('cache', result='miss')
+                self.cache.store(url, response.content, response.headers)
+            return response.content
         except requests.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
+            METRICS.inc('fetch_errors', kind=kind)
             return None
 
-    @abstractmethod
+    def get(self, url, kind='detail'):
+        content = self.fetch(url, kind)
+        if content is None:
+            return None
+        with METRICS.timer('parse', kind=kind):
+            return self.make_soup(content)
+
+    def make_soup(self, content):
+        return BeautifulSoup(content, self.parser)
+
+    def __getstate__(self):
+        # Parse worker processes get a copy of the site for its parsing methods only;
+        # the session, cache and throttle stay with the fetchers
+        state = self.__dict__.copy()
+        state.update(session=None, cache=None, throttle=None)
+        return state
+
+    async def afetch(self, session, url, kind='detail', retries=5, backoff_factor=0.1):
+        """Asynchronous counterpart of fetch() using a shared aiohttp session."""
+        if self.stopped:
+            return None
+        entry = self.cache.get(url, kind) if self.cache else None
+        if entry and entry.fresh:
+            METRICS.inc('cache', result='hit')
+            return entry.body
+        headers = dict(self.headers, **self.cache.validators(entry)) if entry else self.headers
+        for attempt in range(retries + 1):
+            if self.throttle:
+                await self.throttle.acquire_async()
+            start = time.monotonic()
+            status = None
+            try:
+                async with session.get(url, headers=headers) as response:
+                    status = response.status
+                    response_headers = response.headers
+                    content = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error fetching {url}: {e}")
+                METRICS.inc('fetch_errors', kind=kind)
+                return None
+            finally:
+                elapsed = time.monotonic() - start
+                METRICS.observe('fetch', elapsed, kind=kind)
+                if self.throttle:
+                    self.throttle.release(status, elapsed)
+            if status in THROTTLE_STATUSES and attempt < retries:
+                delay = retry_after_seconds(response_headers) or THROTTLE_BACKOFF * (2 ** attempt)
+                logger.warning(f"Throttled by {url} (HTTP {status}), retrying in {delay:.1f}s")
+                METRICS.inc('retries', reason='throttled')
+                if self.throttle:
+                    await self.throttle.pause_async(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            if status in RETRY_STATUSES and attempt < retries:
+                METRICS.inc('retries', reason='server_error')
+                await asyncio.sleep(backoff_factor * (2 ** attempt))
+                continue
+            break
+
+        if entry and status == 304:
+            self.cache.mark_revalidated(url)
+            METRICS.inc('cache', result='revalidated')
+            return entry.body
+        if status >= 400:
+            logger.error(f"Error fetching {url}: HTTP {status}")
+            METRICS.inc('fetch_errors', kind=kind)
+            return None
+        if self.cache:
+            METRICS.inc('cache', result='miss')
+            self.cache.store(url, content, response_headers)
+        return content
+
+    async def aget(self, session, url, kind='detail'):
+        content = await self.afetch(session, url, kind)
+        if content is None:
+            return None
+        with METRICS.timer('parse', kind=kind):
+            return self.make_soup(content)
+
     def extract_magnet_link(self, torrent_page_url):
+        soup = self.get(torrent_page_url)
+        if not soup:
+            return None
+        info = self.parse_torrent_page(soup)
+        if info:
+            info['url'] = torrent_page_url
+        return info
+
+    def get_links_from_page(self, query, page_num):
+        """Return the Listing rows of one search page."""
+        soup = self.get(self.generate_search_url(query, page_num), kind='search')
+        if not soup:
+            return []
+        return self.parse_listings(soup)
+
+    async def aextract_magnet_link(self, session, torrent_page_url):
+        soup = await self.aget(session, torrent_page_url)
+        if not soup:
+            return None
+        info = self.parse_torrent_page(soup)
+        if info:
+            info['url'] = torrent_page_url
+        return info
+
+    async def aget_links_from_page(self, session, query, page_num):
+        soup = await self.aget(session, self.generate_search_url(query, page_num), kind='search')
+        if not soup:
+            return []
+        return self.parse_listings(soup)
+
+    @abstractmethod
+    def parse_torrent_page(self, soup):
+        """Return the torrent info dict for a parsed detail page, or None."""
         raise NotImplementedError("This method should be implemented by subclasses.")
 
     @abstractmethod
-    def get_links_from_page(self, query, page_num):
+    def parse_listings(self, soup):
+        """Return a records.Listing for each torrent on a parsed search page."""
         raise NotImplementedError("This method should be implemented by subclasses.")
 
     @abstractmethod
@@ -57,66 +296,86 @@ class Site(ABC):  # Abstract Base Class (ABC)
         """Generate the search URL for the specific site."""
         raise NotImplementedError("This method should be implemented by subclasses.")
 
+    def generate_newest_url(self, query, page_num):
+        """Generate the URL of search results sorted newest first, for incremental crawls."""
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental crawls.")
+
+# Site classes selectable by name with --site; each takes a parser keyword argument
+SITES = {}
+
+def register_site(name):
+    """Class decorator adding a Site subclass to SITES under name."""
+    def register(cls):
+        SITES[name] = cls
+        return cls
+    return register
+
 # 1337x child class
+@register_site('1337x')
 class Torrent1337x(Site):
-    def __init__(self):
+    def __init__(self, parser='html.parser'):
         base_url = 'https://www.1337x.to'
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
         }
-        super().__init__(base_url, headers)
+        super().__init__(base_url, headers, parser)
 
     def extract_torrent_info(self, soup, magnet_link):
-        info = {}
-
-        # Find all list items
-        list_items = soup.find_all('ul', class_='list')
-
-        # Helper function to find value by label
-
-
         # Flatten all list items
         all_items = []
-        for ul in list_items:
+        for ul in soup.find_all('ul', class_='list'):
             all_items.extend(ul.find_all('li'))
 
-        # Extract information
-        info['category'] = get_value_by_label(all_items, 'Category')
-        info['type'] = get_value_by_label(all_items, 'Type')
-        info['language'] = get_value_by_label(all_items, 'Language')
-        info['size'] = get_value_by_label(all_items, 'Total size')
-        info['uploaded_by'] = get_value_by_label(all_items, 'Uploaded By')
-        info['downloads'] = get_value_by_label(all_items, 'Downloads')
-        info['last_checked'] = get_value_by_label(all_items, 'Last checked')
-        info['date_uploaded'] = get_value_by_label(all_items, 'Date uploaded')
-        info['seeders'] = get_value_by_label(all_items, 'Seeders')
-        info['leechers'] = get_value_by_label(all_items, 'Leechers')
+        values = get_values_by_label(all_items)
+        info = {key: values.get(label, 'N/A') for label, key in TORRENT_INFO_LABELS.items()}
+        heading = soup.select_one('div.box-info-heading h1')
+        info['name'] = heading.get_text(strip=True) if heading else 'N/A'
         info['magnet_link'] = magnet_link
-
         return info
 
-    def extract_magnet_link(self, torrent_page_url):
-        soup = self.get(torrent_page_url)
-        if not soup:
-            return None
-
+    def parse_torrent_page(self, soup):
         magnet_link_element = soup.find('a', {'id': 'openPopup'})
         if magnet_link_element:
             magnet_link = magnet_link_element['href']
             return self.extract_torrent_info(soup, magnet_link)
         return None
 
-    def get_links_from_page(self, query, page_num):
-        url = self.generate_search_url(query, page_num)
-        soup = self.get(url)
-        if not soup:
-            return []
-        return [f"{self.base_url}{a['href']}" for td in soup.find_all('td', class_='coll-1 name') for a in td.find_all('a')[1:2]]
+    def parse_listings(self, soup):
+        listings = []
+        scraped_at = time.time()
+        for name_cell in soup.find_all('td', class_='coll-1 name'):
+            links = name_cell.find_all('a')
+            if len(links) < 2:
+                continue
+            row = name_cell.parent
+            icon = name_cell.select_one('a.icon i')
+            icon_classes = icon.get('class', []) if icon else []
+            category = next((LISTING_CATEGORIES[c] for c in icon_classes if c in LISTING_CATEGORIES), None)
+            seeders = row.find('td', class_='coll-2')
+            leechers = row.find('td', class_='coll-3')
+            uploaded = row.find('td', class_='coll-date')
+            # The size cell also holds a hidden seeders span, so only its first text counts
+            size = row.find('td', class_='coll-4')
+            uploader = row.select_one('td.coll-5 a')
+            listings.append(Listing(
+                url=f"{self.base_url}{links[1]['href']}",
+                name=links[1].get_text(strip=True),
+                category=category,
+                seeders=parse_count(seeders.get_text()) if seeders else None,
+                leechers=parse_count(leechers.get_text()) if leechers else None,
+                size_bytes=parse_size(next(size.strings, '')) if size else None,
+                uploaded_at=parse_date(uploaded.get_text(), scraped_at) if uploaded else None,
+                uploaded_by=uploader.get_text(strip=True) if uploader else None,
+            ))
+        return listings
 
     def generate_search_url(self, query, page_num):
         """Generate search URL specific to 1337x"""
         return f'{self.base_url}/search/{query}/{page_num}/'
 
+    def generate_newest_url(self, query, page_num):
+        return f'{self.base_url}/sort-search/{query}/time/desc/{page_num}/'
+
     def get_total_pages(self, soup):
         """Extract the total number of pages from the pagination."""
         if not soup:
@@ -128,41 +387,94 @@ class Torrent1337x(Site):
         return 1
     #other sites can implement their own generate_search_url
 
-def download_magnet_link(magnet_link):
-    try:
-        command = ['qbittorrent', '--skip-dialog=true','--add-paused=true', magnet_link]
-        subprocess.run(command, check=True)
-        logger.info(f"Started download for: {magnet_link}")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error downloading {magnet_link}: {e}")
+def make_skip(journal=None, index=None, filters=None):
+    """Return a predicate telling whether a listing's detail page need not be fetched, or None.
+
+    Listings already scraped, or rejected by filters (a records.ListingFilter), are skipped.
+    """
+    checks = []
+    if journal:
+        checks.append(lambda listing: listing.url in journal.details)
+    if index:
+        checks.append(lambda listing: index.has_torrent(listing.url))
+    if filters:
+        checks.append(lambda listing: not filters.accept(listing))
+    if not checks:
+        return None
+    return lambda listing: any(check(listing) for check in checks)
+
+def passes_filters(info, filters=None):
+    """Check a scraped info against filters, now that its detail page gave every field."""
+    return not filters or filters.matches(TorrentRecord.from_info(info))
 
-def process_page(site, query, page, max_links=None):
-    links = site.get_links_from_page(query, page)
+def iter_page_records(site, query, page, max_links=None, downloader=None, skip=None, failed=None, filters=None):
+    """Yield torrent infos for one search page as each detail page is parsed.
+
+    Magnets are handed to downloader (a qbit_submit.SubmissionBuffer), when given.
+    Listings for which skip(listing) is true are not fetched, and scraped torrents that
+    fail filters are dropped. URLs that could not be scraped are appended to failed,
+    when given, so callers can tell whether the page was completed.
+    """
+    listings = site.get_links_from_page(query, page)
+    if not listings and failed is not None:
+        failed.append(site.generate_search_url(query, page))
     if max_links:
-        links = links[:max_links]
-    results = []
-    for link in links:
+        listings = listings[:max_links]
+    for listing in listings:
+        if skip and skip(listing):
+            continue
+        link = listing.url
         info = site.extract_magnet_link(link)
+        if info and not passes_filters(info, filters):
+            continue
         if info:
-            results.append(info)
             logger.info(f'Added link: {info["magnet_link"]}')
-            if args.download:
-                download_magnet_link(info["magnet_link"])
+            if downloader:
+                downloader.add(info["magnet_link"])
+            yield info
         else:
             logger.warning(f"No magnet link found for {link}")
+            if failed is not None:
+                failed.append(link)
+
+def process_page(site, query, page, max_links=None, downloader=None, sink=None, skip=None, filters=None):
+    """Process one search page, streaming records into sink or returning them as a list.
+
+    The sink is told the page is done only when every link on it was scraped.
+    """
+    results = []
+    failed = []
+    for info in iter_page_records(site, query, page, max_links, downloader, skip, failed, filters):
+        if sink:
+            sink.write(info)
+        else:
+            results.append(info)
+    if sink and not failed:
+        sink.page_done(page)
     return results
 
-def scrape_torrent_links(site, query='', max_pages=None, max_links_per_page=None):
+def scrape_torrent_links(site, query='', max_pages=None, max_links_per_page=None, downloader=None, sink=None,
+                         max_workers=5, journal=None, index=None, filters=None):
+    """Scrape all search pages with a thread pool.
+
+    When sink is given, records are written to it as they are parsed and the returned
+    list is empty; otherwise all records are collected and returned. Pages and detail
+    URLs already recorded in journal, and torrents already in index, are skipped, and
+    so are listings that fail filters (a records.ListingFilter).
+    """
     if not query:
         return []
 
-    r = site.get(site.generate_search_url(query, 1))
+    r = site.get(site.generate_search_url(query, 1), kind='search')
     total_pages = site.get_total_pages(r) if r else 1  # Make sure r is the soup object
     total_pages = min(total_pages, max_pages or float('inf'))
 
+    pages = [page for page in range(1, total_pages + 1) if not journal or page not in journal.pages]
+    skip = make_skip(journal, index, filters)
+
     results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_page = {executor.submit(partial(process_page, site, query, page, max_links_per_page)): page for page in range(1, total_pages + 1)}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_page = {executor.submit(partial(process_page, site, query, page, max_links_per_page, downloader, sink, skip, filters)): page for page in pages}
         for future in tqdm(concurrent.futures.as_completed(future_to_page), total=len(future_to_page), desc="Processing pages"):
             page = future_to_page[future]
             try:
@@ -171,52 +483,859 @@ def scrape_torrent_links(site, query='', max_pages=None, max_links_per_page=None
             except Exception as exc:
                 logger.error(f'Page {page} generated an exception: {exc}')
 
-    logger.info(f"Extracted {len(results)} torrent infos.")
+    if not sink:
+        logger.info(f"Extracted {len(results)} torrent infos.")
+    return results
+
+async def async_scrape_torrent_links(site, query='', max_pages=None, max_links_per_page=None, downloader=None,
+                                     max_concurrency=20, per_host_concurrency=8, sink=None, journal=None,
+                                     index=None, filters=None):
+    """Scrape with asyncio, fetching search and detail pages as independent tasks.
+
+    All requests share one pooled aiohttp session whose connector caps the number of
+    connections globally (max_concurrency) and per host (per_host_concurrency).
+    Records are streamed into sink and known work is skipped as in scrape_torrent_links.
+    """
+    if not query:
+        return []
+
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        first_page = await site.aget(session, site.generate_search_url(query, 1), kind='search')
+        total_pages = site.get_total_pages(first_page) if first_page else 1
+        total_pages = min(total_pages, max_pages or float('inf'))
+
+        pages = [page for page in range(1, total_pages + 1) if not journal or page not in journal.pages]
+        skip = make_skip(journal, index, filters)
+
+        results = []
+        progress = tqdm(total=len(pages), desc="Processing pages")
+
+        async def process_link(listing):
+            if skip and skip(listing):
+                return True
+            link = listing.url
+            info = await site.aextract_magnet_link(session, link)
+            if info and not passes_filters(info, filters):
+                return True
+            if info:
+                logger.info(f'Added link: {info["magnet_link"]}')
+                if downloader:
+                    await loop.run_in_executor(None, downloader.add, info["magnet_link"])
+                if sink:
+                    # sink.write blocks when the writer queue is full, so keep it off the loop
+                    await loop.run_in_executor(None, sink.write, info)
+                else:
+                    results.append(info)
+                return True
+            logger.warning(f"No magnet link found for {link}")
+            return False
+
+        async def process_search_page(page):
+            if page == 1 and first_page:
+                listings = site.parse_listings(first_page)
+            else:
+                listings = await site.aget_links_from_page(session, query, page)
+            if max_links_per_page:
+                listings = listings[:max_links_per_page]
+            done = await asyncio.gather(*(process_link(listing) for listing in listings))
+            if sink and listings and all(done):
+                await loop.run_in_executor(None, sink.page_done, page)
+
+        async def run_page(page):
+            try:
+                await process_search_page(page)
+                logger.info(f"Completed processing page {page}")
+            except Exception as exc:
+                logger.error(f'Page {page} generated an exception: {exc}')
+            finally:
+                progress.update(1)
+
+        await asyncio.gather(*(run_page(page) for page in pages))
+        progress.close()
+
+    if not sink:
+        logger.info(f"Extracted {len(results)} torrent infos.")
+    return results
+
+
+def incremental_scrape_torrent_links(site, query='', max_pages=None, max_links_per_page=None, downloader=None,
+                                     sink=None, max_workers=5, index=None, stale_after=None, filters=None):
+    """Scrape only what changed since earlier runs, walking results newest first.
+
+    Detail pages are fetched only for torrents that are not in index yet, or that were
+    last scraped more than stale_after seconds ago, and paging stops at the first page
+    with no such torrent that also passes filters. Listings that fail filters are not
+    fetched. Detail pages that fail them are recorded in index as rejected under these
+    filters, which only later incremental runs with the same filters treat as known.
+    Records are streamed into sink or returned.
+    """
+    if not query:
+        return []
+
+    results = []
+    seen = set()
+    page = 1
+    total_pages = max_pages or float('inf')
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while page <= total_pages:
+            soup = site.get(site.generate_newest_url(query, page), kind='search')
+            if not soup:
+                break
+            if page == 1:
+                total_pages = min(site.get_total_pages(soup), total_pages)
+            listings = site.parse_listings(soup)
+            if max_links_per_page:
+                listings = listings[:max_links_per_page]
+            if not listings:
+                break
+            links = [listing.url for listing in listings]
+
+            known = index.seen_at(links)
+            if filters:
+                for url, rejected_at in index.rejected_at(links, filters.key()).items():
+                    known[url] = max(known.get(url, rejected_at), rejected_at)
+            cutoff = time.time() - stale_after if stale_after is not None else None
+            # Listings that fail filters never reach the index, so they must not keep paging going
+            wanted = [listing for listing in listings
+                      if (listing.url not in known or (cutoff is not None and known[listing.url] < cutoff))
+                      and (not filters or filters.accept(listing))]
+            if not wanted:
+                logger.info(f"Every torrent on page {page} is already known or filtered out, stopping")
+                break
+            # New uploads push older torrents onto later pages, so a torrent can show up twice
+            todo = [listing.url for listing in wanted if listing.url not in seen]
+            seen.update(links)
+
+            rejected = []
+            for url, info in zip(todo, executor.map(site.extract_magnet_link, todo)):
+                if not info:
+                    continue
+                if not passes_filters(info, filters):
+                    # Fetched but filtered out: the next run with these filters can skip it
+                    rejected.append(url)
+                    continue
+                logger.info(f'Added link: {info["magnet_link"]}')
+                if downloader:
+                    downloader.add(info["magnet_link"])
+                if sink:
+                    sink.write(info)
+                else:
+                    results.append(info)
+            if rejected:
+                index.add_rejected(rejected, filters.key())
+            logger.info(f"Completed page {page}: {len(todo)} of {len(links)} torrents new or stale")
+            page += 1
+
+    if not sink:
+        logger.info(f"Extracted {len(results)} torrent infos.")
+    return results
+
+
+# Site copy used by each parse worker process, set once when the pool starts
+_parse_site = None
+
+def _init_parse_worker(site):
+    global _parse_site
+    _parse_site = site
+
+def _parse_page(kind, content):
+    """Parse raw page content in a worker process.
+
+    Search pages become (total pages, listings) and detail pages a torrent info dict.
+    """
+    soup = _parse_site.make_soup(content)
+    if kind == 'search':
+        return _parse_site.get_total_pages(soup), _parse_site.parse_listings(soup)
+    return _parse_site.parse_torrent_page(soup)
+
+def pipeline_scrape_torrent_links(site, query='', max_pages=None, max_links_per_page=None, downloader=None, sink=None,
+                                  fetch_workers=8, parse_workers=None, queue_size=100, journal=None, index=None,
+                                  filters=None):
+    """Scrape with separate fetch and parse stages so HTML parsing can use every core.
+
+    fetch_workers threads only download raw pages, into a queue bounded at queue_size.
+    Each of parse_workers threads (default: one per CPU) hands a page to a process pool
+    for BeautifulSoup parsing and queues the detail pages a search page lists, so
+    parsing is not held to one core by the GIL. Records are streamed into sink or
+    returned, and known work is skipped as in scrape_torrent_links.
+    """
+    if not query:
+        return []
+    parse_workers = parse_workers or os.cpu_count() or 1
+
+    fetch_queue = queue.Queue()  # (kind, page, url) jobs; URLs only, so left unbounded
+    parse_queue = queue.Queue(maxsize=queue_size)  # (job, raw content) waiting for a parser
+    skip = make_skip(journal, index, filters)
+    lock = threading.Lock()
+    finished = threading.Event()
+    pages_left = {}  # page -> [detail pages still to scrape, whether all succeeded]
+    outstanding = 1  # jobs not yet parsed, plus one held until every search page is queued
+    results = []
+
+    def add_job(job):
+        nonlocal outstanding
+        with lock:
+            outstanding += 1
+        fetch_queue.put(job)
+
+    def job_done():
+        nonlocal outstanding
+        with lock:
+            outstanding -= 1
+            if outstanding == 0:
+                finished.set()
+
+    def detail_done(page, ok):
+        with lock:
+            state = pages_left[page]
+            state[0] -= 1
+            state[1] = state[1] and ok
+            complete = state[0] == 0
+        if complete:
+            page_done(page, state[1])
+
+    def page_done(page, ok):
+        if sink and ok:
+            sink.page_done(page)
+        progress.update(1)
+        logger.info(f"Completed processing page {page}")
+
+    def handle(kind, page, url, parsed):
+        if kind == 'search':
+            listings = parsed[1] if parsed else []
+            if max_links_per_page:
+                listings = listings[:max_links_per_page]
+            todo = [listing for listing in listings if not (skip and skip(listing))]
+            if not todo:
+                page_done(page, bool(listings))
+                return
+            with lock:
+                pages_left[page] = [len(todo), True]
+            for listing in todo:
+                add_job(('detail', page, listing.url))
+            return
+
+        info = parsed
+        if not info:
+            logger.warning(f"No magnet link found for {url}")
+            detail_done(page, False)
+            return
+        info['url'] = url
+        if passes_filters(info, filters):
+            logger.info(f'Added link: {info["magnet_link"]}')
+            if downloader:
+                downloader.add(info["magnet_link"])
+            if sink:
+                sink.write(info)
+            else:
+                results.append(info)
+        detail_done(page, True)
+
+    def fetcher():
+        while True:
+            job = fetch_queue.get()
+            if job is None:
+                return
+            kind, page, url = job
+            try:
+                content = site.fetch(url, kind)
+            except Exception as exc:
+                logger.error(f'{url} generated an exception: {exc}')
+                content = None
+            # Blocks while parse_queue is full, so fetchers never run far ahead of parsers
+            parse_queue.put((job, content))
+
+    def parser(pool):
+        while True:
+            item = parse_queue.get()
+            if item is None:
+                return
+            (kind, page, url), content = item
+            try:
+                parsed = None
+                if content is not None:
+                    # Includes the hop to the worker process, which is part of this stage's cost
+                    with METRICS.timer('parse', kind=kind):
+                        parsed = pool.submit(_parse_page, kind, content).result()
+                handle(kind, page, url, parsed)
+            except Exception as exc:
+                logger.error(f'{url} generated an exception: {exc}')
+                if kind == 'detail':
+                    detail_done(page, False)
+            finally:
+                job_done()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers, initializer=_init_parse_worker,
+                                                initargs=(site,)) as pool:
+        first_url = site.generate_search_url(query, 1)
+        first_page = site.fetch(first_url, kind='search')
+        first_parsed = None
+        if first_page:
+            with METRICS.timer('parse', kind='search'):
+                first_parsed = pool.submit(_parse_page, 'search', first_page).result()
+        total_pages = first_parsed[0] if first_parsed else 1
+        total_pages = min(total_pages, max_pages or float('inf'))
+        pages = [page for page in range(1, total_pages + 1) if not journal or page not in journal.pages]
+        progress = tqdm(total=len(pages), desc="Processing pages")
+
+        threads = [threading.Thread(target=fetcher, name=f'fetch-{i}', daemon=True) for i in range(fetch_workers)]
+        threads += [threading.Thread(target=parser, args=(pool,), name=f'parse-{i}', daemon=True)
+                    for i in range(parse_workers)]
+        for thread in threads:
+            thread.start()
+        for page in pages:
+            if page == 1 and first_parsed:
+                handle('search', page, first_url, first_parsed)
+            else:
+                add_job(('search', page, site.generate_search_url(query, page)))
+        job_done()
+
+        finished.wait()
+        for _ in range(fetch_workers):
+            fetch_queue.put(None)
+        for _ in range(parse_workers):
+            parse_queue.put(None)
+        for thread in threads:
+            thread.join()
+        progress.close()
+
+    if not sink:
+        logger.info(f"Extracted {len(results)} torrent infos.")
+    return results
+
+def load_queries(path, max_pages=None):
+    """Read a batch file of (query, max_pages) pairs.
+
+    Each line holds a query, optionally followed by | and its own page limit; blank
+    lines, lines starting with # and repeated queries are ignored. max_pages applies
+    to queries without a limit.
+    """
+    queries = []
+    seen = set()
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            query, _, pages = (part.strip() for part in line.partition('|'))
+            if pages and not pages.isdigit():
+                raise ValueError(f"{path}:{number}: invalid page limit {pages!r}")
+            if query in seen:
+                continue
+            seen.add(query)
+            queries.append((query, int(pages) if pages else max_pages))
+    return queries
+
+def batch_scrape_torrent_links(site, queries, max_links_per_page=None, downloader=None, sink=None, max_workers=5,
+                               index=None, filters=None):
+    """Scrape many queries through one thread pool, fetching each detail page once.
+
+    queries is a list of (query, max_pages) pairs. The search pages of every query are
+    listed first, so each detail page shared by several queries is fetched once and its
+    info is tagged with all of them in info['queries']. Records are streamed into sink
+    or returned; torrents in index or rejected by filters are skipped.
+    """
+    skip = make_skip(index=index, filters=filters)
+    found = {}  # detail URL -> queries listing it, or None when skipped
+    order = {query: position for position, (query, _) in enumerate(queries)}
+
+    def list_first_page(query):
+        soup = site.get(site.generate_search_url(query, 1), kind='search')
+        if not soup:
+            return 1, []
+        return site.get_total_pages(soup), site.parse_listings(soup)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(list_first_page, query): (query, 1, max_pages) for query, max_pages in queries}
+        listed = 0
+        progress = tqdm(total=len(futures), desc="Listing pages")
+        while futures:
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                query, page, max_pages = futures.pop(future)
+                progress.update(1)
+                try:
+                    listings = future.result()
+                except Exception as exc:
+                    logger.error(f'Page {page} of "{query}" generated an exception: {exc}')
+                    continue
+                if page == 1:
+                    total_pages, listings = listings
+                    for next_page in range(2, min(total_pages, max_pages or float('inf')) + 1):
+                        futures[executor.submit(site.get_links_from_page, query, next_page)] = (query, next_page, None)
+                        progress.total += 1
+                if max_links_per_page:
+                    listings = listings[:max_links_per_page]
+                for listing in listings:
+                    listed += 1
+                    if listing.url not in found:
+                        # Skipped torrents are remembered as None, so each is checked once
+                        found[listing.url] = None if skip and skip(listing) else []
+                    sources = found[listing.url]
+                    if sources is not None and query not in sources:
+                        sources.append(query)
+        progress.close()
+
+        urls = [url for url, sources in found.items() if sources is not None]
+        logger.info(f"{len(queries)} queries listed {listed} torrents, {len(found)} unique; "
+                    f"fetching {len(urls)} detail pages")
+        results = []
+        for url, info in zip(urls, tqdm(executor.map(site.extract_magnet_link, urls), total=len(urls),
+                                        desc="Processing torrents")):
+            if not info:
+                logger.warning(f"No magnet link found for {url}")
+                continue
+            if not passes_filters(info, filters):
+                continue
+            info['queries'] = sorted(found[url], key=order.get)
+            logger.info(f'Added link: {info["magnet_link"]}')
+            if downloader:
+                downloader.add(info["magnet_link"])
+            if sink:
+                sink.write(info)
+            else:
+                results.append(info)
+
+    if not sink:
+        logger.info(f"Extracted {len(results)} torrent infos.")
+    return results
+
+class ResultCollector:
+    """Sink that collects records in a list, so they can be read while a scrape runs."""
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, info):
+        self.records.append(info)
+
+    def page_done(self, page):
+        pass
+
+def federated_scrape_torrent_links(sites, query='', max_pages=None, max_links_per_page=None, downloader=None,
+                                   timeout=None, index=None, filters=None):
+    """Scrape several sites at once and merge their results by infohash.
+
+    sites maps a name to a (Site, max_workers) pair, and each site runs
+    scrape_torrent_links with its own thread pool of that size. A site still running
+    after timeout seconds is stopped and contributes what it scraped so far, so a slow
+    or failing site never holds up the others. Of torrents listed by several sites the
+    copy with the most seeders is kept, with every site that had it in info['sources'].
+    Merged results are returned best seeded first.
+    """
+    if not query:
+        return []
+
+    collected = {name: ResultCollector() for name in sites}
+
+    def run(name, site, max_workers):
+        try:
+            scrape_torrent_links(site, query=query, max_pages=max_pages, max_links_per_page=max_links_per_page,
+                                 sink=collected[name], max_workers=max_workers, index=index, filters=filters)
+        except Exception as exc:
+            logger.error(f'{name} generated an exception: {exc}')
+
+    threads = {
+        name: threading.Thread(target=run, args=(name, site, max_workers), name=f'site-{name}', daemon=True)
+        for name, (site, max_workers) in sites.items()
+    }
+    for thread in threads.values():
+        thread.start()
+    deadline = time.monotonic() + timeout if timeout else None
+    for name, thread in threads.items():
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            sites[name][0].stopped = True
+            logger.warning(f"{name} did not finish within {timeout}s, keeping its {len(collected[name].records)} results so far")
+
+    merged = {}
+    for name, collector in collected.items():
+        for info in list(collector.records):
+            key = parse_infohash(info['magnet_link']) or info['url']
+            best = merged.get(key)
+            sources = best['sources'] if best else []
+            if name not in sources:
+                sources.append(name)
+            if best is None or parse_count(info['seeders']) > parse_count(best['seeders']):
+                info['sources'] = sources
+                merged[key] = info
+    results = sorted(merged.values(), key=lambda info: parse_count(info['seeders']), reverse=True)
+    logger.info(
+        f"Merged {sum(len(c.records) for c in collected.values())} results "
+        f"({', '.join(f'{name}: {len(c.records)}' for name, c in collected.items())}) into {len(results)} torrents"
+    )
+    if downloader:
+        for info in results:
+            downloader.add(info["magnet_link"])
     return results
 
+def parse_site_arg(spec):
+    """'1337x' or '1337x:8' -> (site name, worker threads or None)."""
+    name, _, workers = spec.partition(':')
+    if name not in SITES:
+        raise argparse.ArgumentTypeError(f"unknown site {name!r} (choose from {', '.join(sorted(SITES))})")
+    if workers and not workers.isdigit():
+        raise argparse.ArgumentTypeError(f"invalid worker count in {spec!r}")
+    return name, int(workers) if workers else None
+
+def add_site_arguments(parser):
+    """Add the parser backend, throttle and cache options read by make_site() and open_cache()."""
+    parser.add_argument("--parser", choices=PARSERS, default="html.parser", help="HTML parser backend")
+    parser.add_argument("--rate", type=float, default=None, help="Maximum requests per second across all workers")
+    parser.add_argument("--burst", type=float, default=None, help="Requests allowed back to back before --rate applies")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt concurrency to latency and 429/503 responses")
+    parser.add_argument("--latency-target", type=float, default=2.0, help="Smoothed latency in seconds above which --adaptive backs off")
+    parser.add_argument("--cache", default=None, help="Path of an SQLite HTTP response cache to use")
+    parser.add_argument("--cache-size", type=int, default=256, help="Maximum cache size in MB")
+    parser.add_argument("--search-ttl", type=int, default=600, help="Seconds to reuse cached search pages")
+    parser.add_argument("--detail-ttl", type=int, default=7 * 24 * 3600, help="Seconds to reuse cached detail pages")
+
+def open_cache(args):
+    """The response cache asked for by add_site_arguments() options, or None."""
+    if not args.cache:
+        return None
+    return ResponseCache(args.cache, max_bytes=args.cache_size * 1024 * 1024,
+                         ttls={'search': args.search_ttl, 'detail': args.detail_ttl})
+
+def make_site(name, args, cache=None, max_concurrency=5):
+    """Build a registered site with the parser and throttle from add_site_arguments() options."""
+    site = SITES[name](parser=args.parser)
+    site.cache = cache
+    if args.rate or args.adaptive:
+        site.throttle = AdaptiveThrottle(
+            rate=args.rate, burst=args.burst, adaptive=args.adaptive,
+            max_concurrency=max_concurrency, latency_target=args.latency_target)
+    return site
+
+def refresh_torrent_infos(site, urls, max_workers=5):
+    """Re-scrape known detail pages in parallel, yielding fresh infos in order."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for info in tqdm(executor.map(site.extract_magnet_link, urls), total=len(urls), desc="Refreshing"):
+            if info:
+                yield info
+
+
+def to_csv_row(info):
+    row = {
+        'Category': info['category'],
+        'Type': info['type'],
+        'Language': info['language'],
+        'Size': info['size'],
+        'Uploaded By': info['uploaded_by'],
+        'Downloads': info['downloads'],
+        'Last Checked': info['last_checked'],
+        'Date Uploaded': info['date_uploaded'],
+        'Seeders': info['seeders'],
+        'Leechers': info['leechers'],
+        'Magnet Link': info['magnet_link']
+    }
+    if 'queries' in info:
+        row['Queries'] = '|'.join(info['queries'])
+    if 'sources' in info:
+        row['Sources'] = '|'.join(info['sources'])
+    return row
 
-def save_to_csv(results, filename):
+def save_to_csv(results, filename, fieldnames=CSV_FIELDNAMES):
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'Category',
-            'Type',
-            'Language',
-            'Size',
-            'Uploaded By',
-            'Downloads',
-            'Last Checked',
-            'Date Uploaded',
-            'Seeders',
-            'Leechers',
-            'Magnet Link'
-        ]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
         for info in results:
-            writer.writerow({
-                'Category': info['category'],
-                'Type': info['type'],
-                'Language': info['language'],
-                'Size': info['size'],
-                'Uploaded By': info['uploaded_by'],
-                'Downloads': info['downloads'],
-                'Last Checked': info['last_checked'],
-                'Date Uploaded': info['date_uploaded'],
-                'Seeders': info['seeders'],
-                'Leechers': info['leechers'],
-                'Magnet Link': info['magnet_link']
-            })
+            with METRICS.timer('csv_write'):
+                writer.writerow(to_csv_row(info))
     logger.info(f"Results saved to {filename}")
 
+class CsvStreamWriter:
+    """Write torrent infos to a CSV file from a background thread as they are scraped.
+
+    Producers call write(), which blocks once queue_size records are pending, so a slow
+    disk applies backpressure to the scrapers instead of growing memory. The file is
+    flushed whenever the queue drains, so readers can consume it while the crawl runs.
+
+    With a journal, written detail URLs and completed pages are recorded only after the
+    rows they cover have been flushed, so a resumed crawl never skips unwritten work.
+    Written torrents are added to index and upserted into catalog, when given, at the
+    same point, and appended as typed records to columns, when given.
+    """
+
+    _STOP = object()
+
+    def __init__(self, filename, queue_size=1000, journal=None, append=False, index=None, columns=None,
+                 catalog=None, fieldnames=CSV_FIELDNAMES):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.journal = journal
+        self.index = index
+        self.columns = columns
+        self.catalog = catalog
+        self.append = append
+        self.count = 0
+        self.error = None
+        self._pending = []
+        self._thread = threading.Thread(target=self._run, name='csv-writer', daemon=True)
+
+    def __enter__(self):
+        new_file = not (self.append and os.path.exists(self.filename) and os.path.getsize(self.filename))
+        self._file = open(self.filename, 'a' if self.append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        if new_file:
+            self._writer.writeheader()
+        self._file.flush()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, info):
+        self.queue.put(info)
+
+    def page_done(self, page):
+        self.queue.put(page)
+
+    def close(self):
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._file.close()
+        if self.journal:
+            self.journal.close()
+        if self.error:
+            logger.error(f"Error writing {self.filename}: {self.error}")
+        logger.info(f"Results saved to {self.filename} ({self.count} rows)")
+
+    def _flush(self):
+        self._file.flush()
+        if self.journal:
+            for item in self._pending:
+                if isinstance(item, int):
+                    self.journal.mark_page(item)
+                else:
+                    self.journal.mark_detail(item['url'])
+            self.journal.flush()
+        if self.index:
+            self.index.add_torrents(
+                (item['url'], item['magnet_link']) for item in self._pending if not isinstance(item, int)
+            )
+        if self.catalog:
+            self.catalog.upsert(item for item in self._pending if not isinstance(item, int))
+        self._pending = []
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                break
+            if self.error:
+                # Keep draining so producers never block on a dead writer
+                continue
+            try:
+                if isinstance(item, int):
+                    self._pending.append(item)
+                else:
+                    with METRICS.timer('csv_write'):
+                        self._writer.writerow(to_csv_row(item))
+                    self.count += 1
+                    if self.columns is not None:
+                        self.columns.append(TorrentRecord.from_info(item, time.time()))
+                    if item.get('url'):
+                        self._pending.append(item)
+                if self.queue.empty():
+                    self._flush()
+            except Exception as e:
+                # Not just OSError: index and catalog writes can raise sqlite3 errors
+                self.error = e
+        if not self.error:
+            try:
+                self._flush()
+            except Exception as e:
+                self.error = e
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Torrent Scraper")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", default=None, help="Search query")
+    parser.add_argument("--queries", default=None,
+                        help="File of queries to scrape in one batch, one per line, optionally followed by |max-pages")
+    parser.add_argument("--site", action="append", type=parse_site_arg, default=None,
+                        help=f"Site to search, optionally NAME:WORKERS; repeat to search several at once and merge "
+                             f"results by infohash ({', '.join(sorted(SITES))}, default: 1337x)")
+    parser.add_argument("--site-timeout", type=float, default=None,
+                        help="With several --site, stop waiting for a site after this many seconds and keep its results so far")
     parser.add_argument("--max-pages", type=int, default=None, help="Maximum number of pages to scrape")
     parser.add_argument("--max-links", type=int, default=None, help="Maximum number of links per page")
     parser.add_argument("--download", action="store_true", help="Download torrents automatically")
+    parser.add_argument("--download-backend", choices=["webapi", "subprocess"], default="webapi",
+                        help="Add torrents through the qBittorrent Web API or by launching qbittorrent")
+    parser.add_argument("--qbit-host", action="append", default=None,
+                        help="qBittorrent Web UI host, optionally user:password@host; repeat to spread torrents "
+                             "over several instances (webapi backend, default: localhost:8081)")
+    parser.add_argument("--qbit-username", default="admin", help="qBittorrent Web UI username")
+    parser.add_argument("--qbit-password", default="adminadmin", help="qBittorrent Web UI password")
     parser.add_argument("--output", default="results.csv", help="Output CSV file name")
+    parser.add_argument("--engine", choices=["threads", "async", "pipeline"], default="threads", help="Scrape engine to use")
+    parser.add_argument("--workers", type=int, default=5, help="Number of page worker threads (threads engine)")
+    parser.add_argument("--fetch-workers", type=int, default=8, help="Number of fetch threads (pipeline engine)")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Number of parse processes (pipeline engine, default: one per CPU)")
+    parser.add_argument("--parse-queue-size", type=int, default=100, help="Maximum fetched pages waiting to be parsed (pipeline engine)")
+    parser.add_argument("--max-concurrency", type=int, default=20, help="Maximum concurrent requests (async engine)")
+    parser.add_argument("--per-host-concurrency", type=int, default=8, help="Maximum concurrent requests per host (async engine)")
+    parser.add_argument("--stream", action="store_true", help="Write rows to the output file as they are scraped")
+    parser.add_argument("--queue-size", type=int, default=1000, help="Maximum rows buffered before scrapers block (with --stream)")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted --stream crawl into the same output file")
+    parser.add_argument("--index", default=None, help="Path of an SQLite index of known torrents to skip")
+    parser.add_argument("--parquet", default=None, help="Also write typed results to this Parquet file")
+    parser.add_argument("--catalog", default=None, help="Path of an SQLite catalog to upsert scraped torrents into")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Walk results newest first and stop at the first page with no new torrents (requires --index)")
+    parser.add_argument("--stale-after", type=int, default=None,
+                        help="With --incremental, also re-scrape known torrents last scraped this many seconds ago")
+    parser.add_argument("--min-seeders", type=int, default=None, help="Skip torrents with fewer seeders")
+    parser.add_argument("--min-size", type=parse_size_arg, default=None, help="Skip torrents smaller than this, e.g. 700MB")
+    parser.add_argument("--max-size", type=parse_size_arg, default=None, help="Skip torrents larger than this, e.g. 4GB")
+    parser.add_argument("--uploader", default=None, help="Only scrape torrents from this uploader")
+    parser.add_argument("--category", default=None, help="Only scrape torrents in this category, e.g. Movies")
+    add_site_arguments(parser)
+    add_metrics_arguments(parser)
     args = parser.parse_args()
+    if bool(args.query) == bool(args.queries):
+        parser.error("give either a query or --queries")
+    if args.queries:
+        if args.engine != "threads" or args.incremental or args.resume:
+            parser.error("--queries runs on the threads engine and cannot be combined with --incremental or --resume")
+        try:
+            queries = load_queries(args.queries, args.max_pages)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    site_names = [name for name, _ in args.site or []]
+    duplicates = sorted({name for name in site_names if site_names.count(name) > 1})
+    if duplicates:
+        parser.error(f"--site {', '.join(duplicates)} given more than once; give each site once, as NAME:WORKERS")
+    site_specs = dict(args.site or [('1337x', None)])
+    federated = len(site_specs) > 1
+    if federated and (args.queries or args.incremental or args.stream or args.resume or args.engine != "threads"):
+        parser.error("several --site run on the threads engine and cannot be combined with --queries, "
+                     "--incremental, --stream or --resume")
+    if args.incremental and not args.index:
+        parser.error("--incremental needs --index to know which torrents earlier runs scraped")
+    if args.incremental and args.resume:
+        parser.error("--incremental cannot be combined with --resume; just run it again")
+
+    cache = open_cache(args)
+    # Each site gets its own worker budget and throttle, so one site's limits never slow another
+    sites = {}
+    for name, workers in site_specs.items():
+        workers = workers or args.workers
+        site = make_site(name, args, cache,
+                         {"async": args.max_concurrency, "pipeline": args.fetch_workers}.get(args.engine, workers))
+        if federated:
+            site.timeout = args.site_timeout
+        sites[name] = (site, workers)
+    site, max_workers = next(iter(sites.values()))
+
+    index = TorrentIndex(args.index) if args.index else None
+    # Checked against search listings first, so rejected torrents cost no detail request
+    filters = ListingFilter(min_seeders=args.min_seeders, min_size=args.min_size, max_size=args.max_size,
+                            uploader=args.uploader, category=args.category) or None
+    downloader = None
+    if args.download:
+        downloader = SubmissionBuffer(make_submitter(
+            args.download_backend, args.qbit_host or ['localhost:8081'], args.qbit_username, args.qbit_password),
+            index=index)
+
+    def run_scrape(sink=None, journal=None):
+        if federated:
+            return federated_scrape_torrent_links(
+                sites, query=args.query, max_pages=args.max_pages, max_links_per_page=args.max_links,
+                downloader=downloader, timeout=args.site_timeout, index=index, filters=filters)
+        if args.queries:
+            # One pool for every query, so overlapping detail pages are fetched once
+            return batch_scrape_torrent_links(
+                site, queries, max_links_per_page=args.max_links, downloader=downloader, sink=sink,
+                max_workers=max_workers, index=index, filters=filters)
+        if args.incremental:
+            # Pages are walked one at a time to find where new results end
+            return incremental_scrape_torrent_links(
+                site, query=args.query, max_pages=args.max_pages, max_links_per_page=args.max_links,
+                downloader=downloader, sink=sink, max_workers=max_workers, index=index,
+                stale_after=args.stale_after, filters=filters)
+        if args.engine == "async":
+            return asyncio.run(async_scrape_torrent_links(
+                site, query=args.query, max_pages=args.max_pages, max_links_per_page=args.max_links,
+                downloader=downloader, max_concurrency=args.max_concurrency,
+                per_host_concurrency=args.per_host_concurrency, sink=sink, journal=journal, index=index,
+                filters=filters))
+        if args.engine == "pipeline":
+            return pipeline_scrape_torrent_links(
+                site, query=args.query, max_pages=args.max_pages, max_links_per_page=args.max_links,
+                downloader=downloader, sink=sink, fetch_workers=args.fetch_workers, parse_workers=args.parse_workers,
+                queue_size=args.parse_queue_size, journal=journal, index=index, filters=filters)
+        return scrape_torrent_links(site, query=args.query, max_pages=args.max_pages,
+                                    max_links_per_page=args.max_links, downloader=downloader, sink=sink,
+                                    max_workers=max_workers, journal=journal, index=index, filters=filters)
+
+    catalog = TorrentCatalog(args.catalog) if args.catalog else None
+    columns = None
+    if args.parquet:
+        try:
+            require_pyarrow()
+        except ImportError as e:
+            parser.error(str(e))
+        columns = RecordColumns()
+
+    with instrumented(args):
+        fieldnames = FEDERATED_FIELDNAMES if federated else BATCH_FIELDNAMES if args.queries else CSV_FIELDNAMES
+        if args.stream or args.resume:
+            # Streaming crawls keep a journal next to the output so they can be resumed
+            journal = None
+            if not args.queries:
+                try:
+                    journal = CrawlJournal(f"{args.output}.journal", args.query).open(resume=args.resume)
+                except ValueError as e:
+                    parser.error(str(e))
+            with CsvStreamWriter(args.output, queue_size=args.queue_size, journal=journal, append=args.resume,
+                                 index=index, columns=columns, catalog=catalog, fieldnames=fieldnames) as sink:
+                run_scrape(sink, journal)
+        else:
+            results = run_scrape()
+            save_to_csv(results, args.output, fieldnames)
+            if index:
+                index.add_torrents((info['url'], info['magnet_link']) for info in results)
+            if catalog:
+                catalog.upsert(results)
+            if columns is not None:
+                scraped_at = time.time()
+                columns.extend(TorrentRecord.from_info(info, scraped_at) for info in results)
+
+        if columns is not None:
+            # A resumed crawl only has this run's rows; earlier rows stay in the CSV
+            columns.write_parquet(args.parquet)
+            logger.info(f"Typed results saved to {args.parquet} ({len(columns)} rows)")
+
+        if filters:
+            logger.info(f"Filters skipped {filters.rejected} detail pages")
+        if downloader:
+            downloader.close()
+            logger.info(f"Submitted {downloader.submitted} torrents to qBittorrent")
+    if index:
+        index.close()
+    if catalog:
+        logger.info(f"Catalog {args.catalog} holds {catalog.count()} torrents")
+        catalog.close()
 
-    site = Torrent1337x()  # You can swap this with any other torrent site class you create
-    results = scrape_torrent_links(site, query=args.query, max_pages=args.max_pages, max_links_per_page=args.max_links)
-    save_to_csv(results, args.output)
\ No newline at end of file
+    if cache:
+        stats = cache.stats()
+        logger.info(
+            f"Cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+            f"{stats['misses']} misses, {stats['evictions']} evictions"
+        )
+        cache.close()
+    for name, (site, _) in sites.items():
+        if not site.throttle:
+            continue
+        stats = site.throttle.stats()
+        logger.info(
+            f"Throttle ({name}): concurrency limit {stats['concurrency_limit']}, rate limit {stats['rate_limit'] or 'none'}, "
+            f"{stats['requests']} requests, {stats['throttled']} throttled, {stats['errors']} errors, "
+            f"{stats['increases']} increases, {stats['decreases']} decreases"
+        )
\ No newline at end of file
@@ -0,0 +1,310 @@
+"""Counters and latency histograms shared by the scraper, the CSV processor and the rate limiter.
+
+Code records into the module-level METRICS registry; scripts expose it with
+add_metrics_arguments() and instrumented(): a Prometheus text endpoint
+(--metrics-port), a JSON report written at exit (--metrics-report) and an opt-in
+profile of the whole run (--profile).
+"""
+import argparse
+import bisect
+import contextlib
+import cProfile
+import json
+import logging
+import math
+import pstats
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyinstrument
+    import pyinstrument.renderers
+    import pyinstrument.session
+except ImportError:
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'torrents'
+# Histogram bucket upper bounds in seconds, from cache hits to slow trackers
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """Bucketed latency distribution with a running count, sum and maximum."""
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, capped at the observed maximum."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe how long the block took, whether or not it raised."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition: counters as <name>_total, histograms as <name>_seconds."""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f'# TYPE {PREFIX}_{name}_total counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{PREFIX}_{name}_total{_format_labels(key)} {value:g}')
+            for name, series in sorted(self.histograms.items()):
+                metric = f'{PREFIX}_{name}_seconds'
+                lines.append(f'# TYPE {metric} histogram')
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.counts):
+                        cumulative += count
+                        le = 'le="+Inf"' if bound == math.inf else f'le="{bound:g}"'
+                        lines.append(f'{metric}_bucket{_format_labels(key, le)} {cumulative}')
+                    lines.append(f'{metric}_sum{_format_labels(key)} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{_format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> Dict:
+        """Summary for the end-of-run JSON report; latencies are in milliseconds."""
+        def series_name(name, key):
+            return name + _format_labels(key)
+
+        with self.lock:
+            counters = {
+                series_name(name, key): value
+                for name, series in sorted(self.counters.items()) for key, value in sorted(series.items())
+            }
+            histograms = {
+                series_name(name, key): {
+                    'count': h.count,
+                    'total_s': round(h.sum, 3),
+                    'mean_ms': round(h.sum / h.count * 1000, 2) if h.count else 0.0,
+                    'p50_ms': round(h.quantile(0.5) * 1000, 2),
+                    'p99_ms': round(h.quantile(0.99) * 1000, 2),
+                    'max_ms': round(h.max * 1000, 2),
+                }
+                for name, series in sorted(self.histograms.items()) for key, h in sorted(series.items())
+            }
+        return {'elapsed_s': round(time.time() - self.started, 3), 'counters': counters, 'latency': histograms}
+
+    def serve(self, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+        """Serve /metrics in Prometheus format from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, name='metrics', daemon=True).start()
+        return httpd
+
+
+METRICS = Metrics()
+
+
+class _ThreadProfiles:
+    """Runs a profiler in every thread started while active, keeping the results of threads that finish.
+
+    Both cProfile (before Python 3.12) and pyinstrument only see the thread that starts
+    them, so worker threads get their own profiler, started and stopped on that thread.
+    """
+
+    def __init__(self, start: Callable[[], Any], stop: Callable[[Any], Any]):
+        self.start = start
+        self.stop = stop
+        self.results: List = []
+        self.started = 0
+        self.lock = threading.Lock()
+        self._run = threading.Thread.run
+
+    def __enter__(self) -> '_ThreadProfiles':
+        profiles = self
+        run = self._run
+
+        def profiled_run(thread):
+            with profiles.lock:
+                profiles.started += 1
+            profiler = profiles.start()
+            try:
+                run(thread)
+            finally:
+                result = profiles.stop(profiler)
+                with profiles.lock:
+                    profiles.results.append(result)
+
+        threading.Thread.run = profiled_run
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        threading.Thread.run = self._run
+        with self.lock:
+            running = self.started - len(self.results)
+        if running:
+            logger.warning(f"{running} threads were still running and are missing from the profile")
+
+
+@contextlib.contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """Profile the block and the threads it starts into path: pyinstrument HTML for .html paths, else cProfile stats."""
+    if not path:
+        yield
+        return
+    if path.endswith('.html'):
+        if pyinstrument is None:
+            raise ImportError("HTML profiles require pyinstrument (pip install pyinstrument)")
+        profiler = pyinstrument.Profiler()
+        threads = _ThreadProfiles(_start_pyinstrument, lambda thread_profiler: thread_profiler.stop())
+        profiler.start()
+        try:
+            with threads:
+                yield
+        finally:
+            session = profiler.stop()
+            with threads.lock:
+                for thread_session in threads.results:
+                    session = pyinstrument.session.Session.combine(session, thread_session)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(pyinstrument.renderers.HTMLRenderer().render(session))
+            logger.info(f"Profile saved to {path}")
+        return
+    profiler = cProfile.Profile()
+    # From 3.12 cProfile hooks sys.monitoring, which sees every thread but allows only one profiler
+    threads = _ThreadProfiles(_start_cprofile, _stop_cprofile) if sys.version_info < (3, 12) else None
+    profiler.enable()
+    try:
+        with threads or contextlib.nullcontext():
+            yield
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        if threads:
+            with threads.lock:
+                for thread_profiler in threads.results:
+                    stats.add(thread_profiler)
+        stats.dump_stats(path)
+        logger.info(f"Profile saved to {path} (view with python -m pstats {path})")
+
+
+def _start_pyinstrument():
+    profiler = pyinstrument.Profiler()
+    profiler.start()
+    return profiler
+
+
+def _start_cprofile() -> cProfile.Profile:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop_cprofile(profiler: cProfile.Profile) -> cProfile.Profile:
+    profiler.disable()
+    return profiler
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --metrics-port, --metrics-report and --profile options shared by every script."""
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on this port at /metrics while running")
+    parser.add_argument("--metrics-report", default=None,
+                        help="Write per-stage counters and latencies to this JSON file at exit")
+    parser.add_argument("--profile", default=None,
+                        help="Profile the run into this file: cProfile stats, or a pyinstrument page for .html")
+
+
+@contextlib.contextmanager
+def instrumented(args: argparse.Namespace) -> Iterator[Metrics]:
+    """Expose METRICS as requested by add_metrics_arguments() options for the duration of the block."""
+    METRICS.started = time.time()
+    server = None
+    if args.metrics_port is not None:
+        server = METRICS.serve(args.metrics_port)
+        logger.info(f"Serving metrics on http://localhost:{server.server_address[1]}/metrics")
+    try:
+        with profiled(args.profile):
+            yield METRICS
+    finally:
+        if args.metrics_report:
+            with open(args.metrics_report, 'w', encoding='utf-8') as f:
+                json.dump(METRICS.report(), f, indent=2)
+            logger.info(f"Metrics report saved to {args.metrics_report}")
+        if server:
+            server.shutdown()
+            server.server_close()
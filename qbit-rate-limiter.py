@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 import qbittorrentapi
+import asyncio
+import signal
 import time
 import logging
-import sys
 import requests
-from typing import List, Dict
+import argparse
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
+from sortedcontainers import SortedList
+from qbit_submit import parse_host
+from metrics import METRICS, add_metrics_arguments, instrumented
 
 # Configure logging
 logging.basicConfig(
@@ -14,6 +21,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+STATE_BUCKETS = ['active_downloads', 'resumed_incomplete', 'paused_incomplete', 'completed_torrents']
+
+# Scheduling policies map a torrent to a sort key; smaller keys are downloaded first
+SCHEDULING_POLICIES: Dict[str, Callable[[Dict], Tuple]] = {
+    'least-complete': lambda t: (t.get('progress', 0.0), t.get('added_on', 0)),
+    'smallest-remaining': lambda t: (t.get('amount_left', t.get('size', 0)), t.get('added_on', 0)),
+    'best-seeder-ratio': lambda t: (-t.get('num_seeds', 0) / (t.get('num_leechs', 0) + 1), t.get('added_on', 0)),
+}
+
+class PriorityIndex:
+    """Hashes of one state bucket kept ordered by scheduling priority, best first.
+
+    Updates are O(log n), and the best or worst k torrents can be read from either
+    end of entries without sorting the whole bucket.
+    """
+
+    def __init__(self):
+        self.entries = SortedList()
+        self.keys: Dict[str, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, torrent_hash: str) -> bool:
+        return torrent_hash in self.keys
+
+    def __iter__(self):
+        return (torrent_hash for _, torrent_hash in self.entries)
+
+    def upsert(self, torrent_hash: str, key: Tuple) -> None:
+        self.discard(torrent_hash)
+        self.keys[torrent_hash] = key
+        self.entries.add((key, torrent_hash))
+
+    def discard(self, torrent_hash: str) -> None:
+        key = self.keys.pop(torrent_hash, None)
+        if key is not None:
+            self.entries.remove((key, torrent_hash))
+
+def classify_torrent(torrent: Dict) -> List[str]:
+    """Return the state buckets a torrent belongs to."""
+    # Check if torrent is completed or seeding
+    is_completed = (torrent.get('progress') == 1.0 or
+                    torrent.get('state') in ['uploading', 'stalledUP', 'forcedUP', 'queuedUP', 'pausedUP'])
+    if is_completed:
+        return ['completed_torrents']
+
+    # Only count incomplete torrents towards limits
+    buckets = []
+    if torrent.get('state') in ['downloading', 'stalledDL']:
+        buckets.append('active_downloads')
+    if torrent.get('state') not in ['pausedDL', 'error', 'missingFiles']:
+        buckets.append('resumed_incomplete')
+    else:
+        buckets.append('paused_incomplete')
+    return buckets
+
 class QBitTorrentManager:
     def __init__(
         self,
@@ -23,9 +87,19 @@ class QBitTorrentManager:
         max_active_downloads: int = 10,
         max_resumed_torrents: int = 20,
         max_retries: int = 3,
-        retry_delay: int = 5
+        retry_delay: int = 5,
+        policy: str = 'least-complete',
+        max_bytes_in_flight: Optional[int] = None,
+        min_free_space: Optional[int] = None,
+        max_download_rate: Optional[int] = None
     ):
-        """Initialize QBitTorrent manager with connection and limit settings."""
+        """Initialize QBitTorrent manager with connection and limit settings.
+
+        Besides the torrent count limits, a paused torrent is only resumed when its
+        remaining bytes fit under max_bytes_in_flight, resuming it still leaves
+        min_free_space bytes free on disk, and the client downloads slower than
+        max_download_rate bytes per second. None disables a budget.
+        """
         self.host = host
         self.username = username
         self.password = password
@@ -33,10 +107,25 @@ class QBitTorrentManager:
         self.max_resumed_torrents = max_resumed_torrents
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.priority = SCHEDULING_POLICIES[policy]
+        self.max_bytes_in_flight = max_bytes_in_flight
+        self.min_free_space = min_free_space
+        self.max_download_rate = max_download_rate
         self.qbt_client = None
 
-        # Initial connection
-        self.connect_to_client()
+        # Local torrent table kept current from sync/maindata deltas
+        self.rid = 0
+        self.torrents: Dict[str, Dict] = {}
+        self.buckets: Dict[str, PriorityIndex] = {name: PriorityIndex() for name in STATE_BUCKETS}
+        self.server_state: Dict = {}
+        # Set when the last plan left slots empty because of the byte, disk or rate budgets
+        self.budget_blocked = False
+
+        # Initial connection; an unreachable instance starts disconnected and refresh() retries it
+        try:
+            self.connect_to_client()
+        except Exception as e:
+            logger.error(f"Starting without {self.host} until it can be reached: {e}")
 
     # [Previous connection methods remain unchanged]
     def verify_web_ui_access(self) -> bool:
@@ -77,7 +166,7 @@ class QBitTorrentManager:
             logger.error("2. Web UI is enabled (Tools -> Preferences -> Web UI)")
             logger.error(f"3. Web UI is accessible at http://{self.host}")
             logger.error("4. Username and password are correct")
-            sys.exit(1)
+            raise ConnectionError(f"qBittorrent Web UI is not accessible at {self.host}")
 
         retries = 0
         while retries < self.max_retries:
@@ -90,6 +179,8 @@ class QBitTorrentManager:
                     REQUESTS_ARGS={'timeout': 5}
                 )
                 self.qbt_client.auth_log_in()
+                # A new session cannot continue the previous session's deltas
+                self.rid = 0
                 logger.info("Successfully connected to qBittorrent")
                 break
             except Exception as e:
@@ -103,147 +194,454 @@ class QBitTorrentManager:
                     raise
 
     def check_connection(self) -> bool:
-        """Check if connection is still valid and reconnect if necessary."""
+        """Reconnect after a failed poll; the poll itself proves a healthy connection."""
+        logger.warning("Connection lost, attempting to reconnect...")
         try:
-            self.qbt_client.app_version()
+            self.connect_to_client()
             return True
         except:
-            logger.warning("Connection lost, attempting to reconnect...")
-            try:
-                self.connect_to_client()
-                return True
-            except:
-                return False
+            return False
 
-    def get_torrent_states(self) -> Dict[str, List]:
-        """Get current states of all torrents."""
-        if not self.check_connection():
-            return {
-                'active_downloads': [],
-                'resumed_incomplete': [],
-                'paused_incomplete': [],
-                'completed_torrents': []
-            }
+    def sync_torrents(self) -> int:
+        """Apply the next sync/maindata delta to the local torrent table.
+
+        Returns the number of torrents that moved between state buckets (added, removed,
+        paused, resumed, started or finished); progress and speed updates alone do not
+        count. qBittorrent sends the full list only on the first request or when it cannot
+        serve a delta (full_update); afterwards only changed fields of changed torrents
+        are transferred.
+        """
+        with METRICS.timer('poll', host=self.host):
+            data = self.qbt_client.sync_maindata(rid=self.rid)
+        if data.get('full_update'):
+            self.torrents = {}
+            self.buckets = {name: PriorityIndex() for name in STATE_BUCKETS}
+            self.server_state = {}
+        # Free disk space and transfer speeds arrive as deltas too
+        self.server_state.update(data.get('server_state') or {})
 
+        transitions = 0
+        for torrent_hash, fields in (data.get('torrents') or {}).items():
+            torrent = self.torrents.get(torrent_hash)
+            before = classify_torrent(torrent) if torrent is not None else None
+            torrent = self.torrents.setdefault(torrent_hash, {'hash': torrent_hash})
+            torrent.update(fields)
+            self._reindex(torrent_hash)
+            if classify_torrent(torrent) != before:
+                transitions += 1
+
+        for torrent_hash in data.get('torrents_removed') or []:
+            if self.torrents.pop(torrent_hash, None) is not None:
+                transitions += 1
+            self._reindex(torrent_hash)
+
+        self.rid = data.get('rid', self.rid)
+        return transitions
+
+    def _reindex(self, torrent_hash: str) -> None:
+        """Move one torrent into the state buckets matching its current fields."""
+        torrent = self.torrents.get(torrent_hash)
+        names = classify_torrent(torrent) if torrent is not None else []
+        for name, bucket in self.buckets.items():
+            if name in names:
+                bucket.upsert(torrent_hash, self.priority(torrent))
+            else:
+                bucket.discard(torrent_hash)
+
+    def torrent_info(self, torrent_hash: str) -> Dict:
+        torrent = self.torrents[torrent_hash]
+        return {
+            'hash': torrent_hash,
+            'added_on': torrent.get('added_on', 0),
+            'progress': torrent.get('progress', 0.0),
+            'size': torrent.get('size', 0),
+            'state': torrent.get('state')
+        }
+
+    def remaining_bytes(self, torrent_hash: str) -> int:
+        torrent = self.torrents[torrent_hash]
+        if 'amount_left' in torrent:
+            return torrent['amount_left']
+        return int(torrent.get('size', 0) * (1 - torrent.get('progress', 0.0)))
+
+    def bytes_in_flight(self) -> int:
+        """Bytes still to download for all resumed incomplete torrents."""
+        return sum(self.remaining_bytes(torrent_hash) for torrent_hash in self.buckets['resumed_incomplete'])
+
+    def rate_limited(self) -> bool:
+        """True if the client already downloads at or above max_download_rate."""
+        download_rate = self.server_state.get('dl_info_speed', 0)
+        return self.max_download_rate is not None and download_rate >= self.max_download_rate
+
+    def fits(self, torrent_hash: str, in_flight: int) -> bool:
+        """True if resuming the torrent keeps in_flight bytes within the byte and disk budgets."""
+        total = in_flight + self.remaining_bytes(torrent_hash)
+        if self.max_bytes_in_flight is not None and total > self.max_bytes_in_flight:
+            return False
+        free_space = self.server_state.get('free_space_on_disk')
+        if self.min_free_space is not None and free_space is not None and free_space - total < self.min_free_space:
+            return False
+        return True
+
+    def refresh(self) -> Optional[int]:
+        """Bring the local torrent table up to date.
+
+        Returns the number of torrents that changed state, or None if qBittorrent is unreachable.
+        """
+        if self.qbt_client is None and not self.check_connection():
+            METRICS.inc('poll_errors', host=self.host)
+            return None
         try:
-            torrents = self.qbt_client.torrents_info()
-            active_downloads = []
-            resumed_incomplete = []
-            paused_incomplete = []
-            completed_torrents = []
-
-            for torrent in torrents:
-                torrent_info = {
-                    'hash': torrent.hash,
-                    'added_on': torrent.added_on,
-                    'progress': torrent.progress,
-                    'size': torrent.size,
-                    'state': torrent.state
-                }
-
-                # Check if torrent is completed or seeding
-                is_completed = (torrent.progress == 1.0 or
-                              torrent.state in ['uploading', 'stalledUP', 'forcedUP', 'queuedUP', 'pausedUP'])
-
-                if is_completed:
-                    completed_torrents.append(torrent_info)
-                else:
-                    # Only count incomplete torrents towards limits
-                    if torrent.state in ['downloading', 'stalledDL']:
-                        active_downloads.append(torrent_info)
-
-                    if torrent.state not in ['pausedDL', 'error', 'missingFiles']:
-                        resumed_incomplete.append(torrent_info)
-                    else:
-                        paused_incomplete.append(torrent_info)
-
-            return {
-                'active_downloads': active_downloads,
-                'resumed_incomplete': resumed_incomplete,
-                'paused_incomplete': paused_incomplete,
-                'completed_torrents': completed_torrents
-            }
+            return self.sync_torrents()
         except Exception as e:
             logger.error(f"Error getting torrent states: {str(e)}")
-            return {
-                'active_downloads': [],
-                'resumed_incomplete': [],
-                'paused_incomplete': [],
-                'completed_torrents': []
-            }
+            METRICS.inc('poll_errors', host=self.host)
+            # Start over with a full update on the next poll
+            self.rid = 0
+            self.check_connection()
+            return None
 
-    def sort_torrents(self, torrents: List[Dict]) -> List[Dict]:
-        """Sort torrents by priority (least complete first, then oldest)."""
-        return sorted(torrents, key=lambda x: (x['progress'], x['added_on']))
+    def get_torrent_states(self) -> Dict[str, List]:
+        """Get current states of all torrents, each bucket in priority order."""
+        if self.refresh() is None:
+            return {name: [] for name in STATE_BUCKETS}
+        return {
+            name: [self.torrent_info(torrent_hash) for torrent_hash in bucket]
+            for name, bucket in self.buckets.items()
+        }
 
-    def manage_torrents(self):
-        """Manage torrents according to configured limits."""
-        try:
-            states = self.get_torrent_states()
-            active_downloads = states['active_downloads']
-            resumed_incomplete = states['resumed_incomplete']
-            paused_incomplete = states['paused_incomplete']
-            completed_torrents = states['completed_torrents']
-
-            # Handle exceeding limits - pause newest incomplete torrents first
-            if len(active_downloads) > self.max_active_downloads:
-                torrents_to_pause = sorted(
-                    active_downloads[self.max_active_downloads:],
-                    key=lambda x: (-x['progress'], -x['added_on'])
-                )
-                self.qbt_client.torrents_pause(
-                    torrent_hashes=[t['hash'] for t in torrents_to_pause]
-                )
-                logger.info(f"Paused {len(torrents_to_pause)} torrents to maintain active download limit")
+    def plan(self) -> Tuple[List[str], List[str]]:
+        """Compute the minimal sets of torrents to pause and resume to honour the limits."""
+        return plan_fleet([self], self.max_active_downloads, self.max_resumed_torrents)[0]
 
-            if len(resumed_incomplete) > self.max_resumed_torrents:
-                torrents_to_pause = sorted(
-                    resumed_incomplete[self.max_resumed_torrents:],
-                    key=lambda x: (-x['progress'], -x['added_on'])
-                )
-                self.qbt_client.torrents_pause(
-                    torrent_hashes=[t['hash'] for t in torrents_to_pause]
-                )
-                logger.info(f"Paused {len(torrents_to_pause)} torrents to maintain resumed torrent limit")
+    def has_waiting_slots(self) -> bool:
+        """True if paused torrents wait while a slot is free under both limits."""
+        return (
+            not self.budget_blocked
+            and len(self.buckets['active_downloads']) < self.max_active_downloads
+            and len(self.buckets['resumed_incomplete']) < self.max_resumed_torrents
+            and len(self.buckets['paused_incomplete']) > 0
+        )
 
-            # Handle under limits - resume oldest, least complete torrents first
-            space_for_active = self.max_active_downloads - len(active_downloads)
-            space_for_resumed = self.max_resumed_torrents - len(resumed_incomplete)
+    def apply(self, to_pause: List[str], to_resume: List[str]) -> None:
+        """Send one batched pause and one batched resume call."""
+        if to_pause:
+            with METRICS.timer('pause', host=self.host):
+                self.qbt_client.torrents_pause(torrent_hashes=to_pause)
+            METRICS.inc('state_changes', len(to_pause), action='pause')
+            logger.info(f"Paused {len(to_pause)} torrents on {self.host} to maintain download limits")
+        if to_resume:
+            with METRICS.timer('resume', host=self.host):
+                self.qbt_client.torrents_resume(torrent_hashes=to_resume)
+            METRICS.inc('state_changes', len(to_resume), action='resume')
+            logger.info(f"Resumed {len(to_resume)} torrents on {self.host} to utilize available slots")
 
-            if space_for_resumed > 0 and paused_incomplete:
-                sorted_paused = self.sort_torrents(paused_incomplete)
-                torrents_to_resume = sorted_paused[:space_for_resumed]
-                self.qbt_client.torrents_resume(
-                    torrent_hashes=[t['hash'] for t in torrents_to_resume]
-                )
-                logger.info(f"Resumed {len(torrents_to_resume)} torrents to utilize available slots")
+    def status(self) -> str:
+        return (
+            f"Active downloads: {len(self.buckets['active_downloads'])}/{self.max_active_downloads}, "
+            f"Resumed incomplete: {len(self.buckets['resumed_incomplete'])}/{self.max_resumed_torrents}, "
+            f"Paused incomplete: {len(self.buckets['paused_incomplete'])}, "
+            f"Completed/Seeding: {len(self.buckets['completed_torrents'])}, "
+            f"In flight: {self.bytes_in_flight() / 1024 ** 3:.1f} GB"
+        )
 
-            logger.info(
-                f"Status: Active downloads: {len(active_downloads)}/{self.max_active_downloads}, "
-                f"Resumed incomplete: {len(resumed_incomplete)}/{self.max_resumed_torrents}, "
-                f"Paused incomplete: {len(paused_incomplete)}, "
-                f"Completed/Seeding: {len(completed_torrents)}"
-            )
+    def manage_torrents(self) -> Optional[int]:
+        """Manage torrents according to configured limits.
+
+        Issues at most one pause and one resume call per tick. Returns how many torrents
+        changed or were moved, or None if the tick failed.
+        """
+        try:
+            changed = self.refresh()
+            if changed is None:
+                return None
+
+            to_pause, to_resume = self.plan()
+            self.apply(to_pause, to_resume)
+            logger.info(f"Status: {self.status()}")
+            return changed + len(to_pause) + len(to_resume)
 
         except Exception as e:
             logger.error(f"Error managing torrents: {str(e)}")
+            return None
+
+
+def _ranked(manager: QBitTorrentManager, index: int, bucket: str, worst: bool = False):
+    """(key, hash, instance index) entries of one bucket, best or worst first."""
+    entries = manager.buckets[bucket].entries
+    for key, torrent_hash in (reversed(entries) if worst else entries):
+        yield key, torrent_hash, index
+
+
+def plan_fleet(
+    managers: List[QBitTorrentManager],
+    max_active_downloads: int,
+    max_resumed_torrents: int
+) -> List[Tuple[List[str], List[str]]]:
+    """Plan pauses and resumes for several instances under shared limits.
+
+    Each instance's own limits are enforced first, then the fleet-wide ones, always
+    pausing the lowest priority torrents across all instances and resuming the highest
+    priority paused torrents that fit their instance's limits and budgets. Returns one
+    (to_pause, to_resume) pair per manager.
+    """
+    pausing: List[List[str]] = [[] for _ in managers]
+    selected: Set[Tuple[int, str]] = set()
+
+    def pending(index: int, bucket: str) -> int:
+        return sum(1 for h in pausing[index] if h in managers[index].buckets[bucket])
+
+    def pause_from(entries, count: int) -> None:
+        for _, torrent_hash, index in entries:
+            if count <= 0:
+                break
+            if (index, torrent_hash) not in selected:
+                selected.add((index, torrent_hash))
+                pausing[index].append(torrent_hash)
+                count -= 1
+
+    # Active downloads are also resumed, so pausing them counts towards both limits
+    for bucket, limit, fleet_limit in (
+        ('active_downloads', 'max_active_downloads', max_active_downloads),
+        ('resumed_incomplete', 'max_resumed_torrents', max_resumed_torrents),
+    ):
+        for index, manager in enumerate(managers):
+            excess = len(manager.buckets[bucket]) - getattr(manager, limit) - pending(index, bucket)
+            pause_from(_ranked(manager, index, bucket, worst=True), excess)
+        excess = sum(len(m.buckets[bucket]) - pending(i, bucket) for i, m in enumerate(managers)) - fleet_limit
+        if excess > 0:
+            pause_from(heapq.merge(*(_ranked(m, i, bucket, worst=True) for i, m in enumerate(managers)),
+                                   reverse=True), excess)
+
+    active = [len(m.buckets['active_downloads']) - pending(i, 'active_downloads') for i, m in enumerate(managers)]
+    resumed = [len(m.buckets['resumed_incomplete']) - len(pausing[i]) for i, m in enumerate(managers)]
+    in_flight = [
+        m.bytes_in_flight() - sum(m.remaining_bytes(h) for h in pausing[i]) for i, m in enumerate(managers)
+    ]
+    slots = min(max_active_downloads - sum(active), max_resumed_torrents - sum(resumed))
+
+    resuming: List[List[str]] = [[] for _ in managers]
+    open_instances = set()
+    for index, manager in enumerate(managers):
+        manager.budget_blocked = manager.rate_limited()
+        if manager.budget_blocked:
+            logger.info(f"Download rate on {manager.host} at limit, not resuming torrents")
+        elif active[index] < manager.max_active_downloads and resumed[index] < manager.max_resumed_torrents:
+            open_instances.add(index)
+
+    best_paused = heapq.merge(*(_ranked(m, i, 'paused_incomplete') for i, m in enumerate(managers)))
+    for _, torrent_hash, index in best_paused:
+        if slots <= 0 or not open_instances:
+            break
+        if index not in open_instances:
+            continue
+        manager = managers[index]
+        if not manager.fits(torrent_hash, in_flight[index]):
+            # A smaller torrent further down may still fit
+            manager.budget_blocked = True
+            continue
+        resuming[index].append(torrent_hash)
+        in_flight[index] += manager.remaining_bytes(torrent_hash)
+        active[index] += 1
+        resumed[index] += 1
+        slots -= 1
+        if active[index] >= manager.max_active_downloads or resumed[index] >= manager.max_resumed_torrents:
+            open_instances.discard(index)
+
+    return list(zip(pausing, resuming))
+
+
+class FleetManager:
+    """Drives several qBittorrent instances under fleet-wide limits.
+
+    Every instance is polled in parallel on its own thread. An instance that has not
+    answered within poll_timeout sits out the tick, counted at its last known size,
+    so one slow or dead box does not hold up the others.
+    """
+
+    def __init__(
+        self,
+        managers: List[QBitTorrentManager],
+        max_active_downloads: int,
+        max_resumed_torrents: int,
+        poll_timeout: float = 10.0
+    ):
+        self.managers = managers
+        self.max_active_downloads = max_active_downloads
+        self.max_resumed_torrents = max_resumed_torrents
+        self.poll_timeout = poll_timeout
+        self.executor = ThreadPoolExecutor(max_workers=len(managers))
+        self.polls: Dict[int, asyncio.Future] = {}
+
+    async def manage_torrents(self) -> Optional[int]:
+        """Run one tick across the fleet; returns changed plus moved torrents, or None."""
+        loop = asyncio.get_running_loop()
+        for index, manager in enumerate(self.managers):
+            if index not in self.polls:
+                self.polls[index] = loop.run_in_executor(self.executor, manager.refresh)
+        await asyncio.wait(self.polls.values(), timeout=self.poll_timeout)
+
+        live, changed = [], 0
+        for index, manager in enumerate(self.managers):
+            poll = self.polls[index]
+            if not poll.done():
+                logger.warning(f"{manager.host} did not answer within {self.poll_timeout}s, skipping it this tick")
+                continue
+            del self.polls[index]
+            if poll.result() is not None:
+                live.append(manager)
+                changed += poll.result()
+        if not live:
+            return None
+
+        # Instances sitting out still hold their slots
+        idle = [m for m in self.managers if m not in live]
+        plans = plan_fleet(
+            live,
+            self.max_active_downloads - sum(len(m.buckets['active_downloads']) for m in idle),
+            self.max_resumed_torrents - sum(len(m.buckets['resumed_incomplete']) for m in idle)
+        )
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, m.apply, *plan) for m, plan in zip(live, plans)),
+            return_exceptions=True
+        )
+        for manager, result in zip(live, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error managing torrents on {manager.host}: {result}")
+
+        if len(self.managers) > 1:
+            for manager in live:
+                logger.info(f"Status {manager.host}: {manager.status()}")
+        logger.info(
+            f"Status: Active downloads: {self.count('active_downloads')}/{self.max_active_downloads}, "
+            f"Resumed incomplete: {self.count('resumed_incomplete')}/{self.max_resumed_torrents}, "
+            f"Paused incomplete: {self.count('paused_incomplete')}, "
+            f"Completed/Seeding: {self.count('completed_torrents')}, "
+            f"Instances: {len(live)}/{len(self.managers)}"
+        )
+        return changed + sum(len(to_pause) + len(to_resume) for to_pause, to_resume in plans)
+
+    def count(self, bucket: str) -> int:
+        return sum(len(manager.buckets[bucket]) for manager in self.managers)
+
+    def has_waiting_slots(self) -> bool:
+        return (
+            self.count('active_downloads') < self.max_active_downloads
+            and self.count('resumed_incomplete') < self.max_resumed_torrents
+            and any(manager.has_waiting_slots() for manager in self.managers)
+        )
+
+
+class PollScheduler:
+    """Adaptive poll interval for the control loop.
+
+    Drops to min_interval while torrents change state or slots are waiting to be filled,
+    and backs off geometrically towards max_interval while the client is steady.
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 30.0, backoff: float = 1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+    def next_interval(self, activity: Optional[int], busy: bool = False) -> float:
+        if activity is None:
+            # Failed tick: retry at the slow rate instead of hammering a dead client
+            self.interval = self.max_interval
+        elif activity or busy:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
+
+
+async def control_loop(fleet: FleetManager, scheduler: PollScheduler, wake: asyncio.Event) -> None:
+    """Run manage_torrents ticks until cancelled, sleeping an adaptive interval in between.
+
+    Setting wake starts the next tick immediately, e.g. after new torrents were added.
+    """
+    while True:
+        # Clear before the tick, so a wakeup that arrives mid-tick still skips the next sleep
+        wake.clear()
+        activity = await fleet.manage_torrents()
+        interval = scheduler.next_interval(activity, busy=fleet.has_waiting_slots())
+        try:
+            await asyncio.wait_for(wake.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
 
 def main():
     """Main function to run the torrent manager."""
-    manager = QBitTorrentManager(
-        host='localhost:8081',
-        username='admin',
-        password='adminadmin',
-        max_active_downloads=20,
-        max_resumed_torrents=40,
-        max_retries=3,
-        retry_delay=5
-    )
+    parser = argparse.ArgumentParser(description="qBittorrent download rate limiter")
+    parser.add_argument("--host", action="append", default=None,
+                        help="qBittorrent Web UI host, optionally user:password@host; repeat to manage a fleet "
+                             "of instances under shared limits (default: localhost:8081)")
+    parser.add_argument("--username", default="admin", help="Web UI username")
+    parser.add_argument("--password", default="adminadmin", help="Web UI password")
+    parser.add_argument("--max-active-downloads", type=int, default=20, help="Maximum concurrent active downloads")
+    parser.add_argument("--max-resumed-torrents", type=int, default=40, help="Maximum resumed incomplete torrents")
+    parser.add_argument("--instance-max-active-downloads", type=int, default=None,
+                        help="Maximum active downloads on any one instance (default: --max-active-downloads)")
+    parser.add_argument("--instance-max-resumed-torrents", type=int, default=None,
+                        help="Maximum resumed incomplete torrents on any one instance (default: --max-resumed-torrents)")
+    parser.add_argument("--policy", choices=sorted(SCHEDULING_POLICIES), default="least-complete",
+                        help="Which torrents get download slots first")
+    parser.add_argument("--max-in-flight", type=float, default=None,
+                        help="Maximum GB still to download across resumed torrents")
+    parser.add_argument("--min-free-space", type=float, default=None,
+                        help="GB of free disk space to keep after all resumed torrents complete")
+    parser.add_argument("--max-download-rate", type=float, default=None,
+                        help="Do not resume torrents while the client downloads faster than this many MB/s")
+    parser.add_argument("--min-interval", type=float, default=1.0, help="Poll interval in seconds while torrents are changing state")
+    parser.add_argument("--max-interval", type=float, default=30.0, help="Longest poll interval in seconds while steady")
+    parser.add_argument("--poll-timeout", type=float, default=10.0,
+                        help="Seconds to wait for an instance before leaving it out of a tick")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    managers = []
+    for spec in args.host or ['localhost:8081']:
+        host, username, password = parse_host(spec, args.username, args.password)
+        # Byte, disk and rate budgets apply to each instance separately
+        managers.append(QBitTorrentManager(
+            host=host,
+            username=username,
+            password=password,
+            max_active_downloads=args.instance_max_active_downloads or args.max_active_downloads,
+            max_resumed_torrents=args.instance_max_resumed_torrents or args.max_resumed_torrents,
+            max_retries=3,
+            retry_delay=5,
+            policy=args.policy,
+            max_bytes_in_flight=int(args.max_in_flight * 1024 ** 3) if args.max_in_flight is not None else None,
+            min_free_space=int(args.min_free_space * 1024 ** 3) if args.min_free_space is not None else None,
+            max_download_rate=int(args.max_download_rate * 1024 ** 2) if args.max_download_rate is not None else None
+        ))
+    fleet = FleetManager(managers, args.max_active_downloads, args.max_resumed_torrents,
+                         poll_timeout=args.poll_timeout)
+
+    scheduler = PollScheduler(min_interval=args.min_interval, max_interval=args.max_interval)
+
+    async def run():
+        wake = asyncio.Event()
+        if hasattr(signal, 'SIGUSR1'):
+            loop = asyncio.get_running_loop()
+            # kill -USR1 <pid> forces an immediate tick, e.g. after a bulk import
+            loop.add_signal_handler(signal.SIGUSR1, wake.set)
+            # Stop cleanly on SIGTERM too, so the metrics report is still written
+            loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await control_loop(fleet, scheduler, wake)
+        except asyncio.CancelledError:
+            logger.info("Stopping torrent manager...")
 
     try:
-        while True:
-            manager.manage_torrents()
-            time.sleep(10)  # Check every 10 seconds
+        with instrumented(args):
+            try:
+                asyncio.run(run())
+            finally:
+                # Join the poll threads inside the block so --profile includes them
+                fleet.executor.shutdown()
     except KeyboardInterrupt:
         logger.info("Stopping torrent manager...")
 
@@ -0,0 +1,242 @@
+import asyncio
+import subprocess
+import threading
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence, Tuple
+
+import qbittorrentapi
+
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+def parse_host(spec: str, username: str, password: str) -> Tuple[str, str, str]:
+    """Split a 'user:password@host:port' spec; missing credentials fall back to the defaults."""
+    if '@' not in spec:
+        return spec, username, password
+    credentials, host = spec.rsplit('@', 1)
+    user, _, secret = credentials.partition(':')
+    return host, user or username, secret or password
+
+
+class WebApiSubmitter:
+    """Adds magnets through the qBittorrent Web API, many per torrents/add call.
+
+    One authenticated client (and its pooled HTTP session) is reused for every call, so
+    importing thousands of magnets costs a handful of requests instead of a process
+    launch per torrent.
+    """
+
+    batched = True
+
+    def __init__(
+        self,
+        host: str = 'localhost:8081',
+        username: str = 'admin',
+        password: str = 'adminadmin',
+        batch_size: int = 500,
+        paused: bool = True
+    ):
+        self.host = host
+        self.batch_size = batch_size
+        self.paused = paused
+        self.client = qbittorrentapi.Client(
+            host=f"http://{host}",
+            username=username,
+            password=password,
+            VERIFY_WEBUI_CERTIFICATE=False,
+            REQUESTS_ARGS={'timeout': 30}
+        )
+
+    def submit(self, magnet_links: List[str]) -> List[str]:
+        """Add magnets in batches and return the ones qBittorrent accepted."""
+        accepted = []
+        for start in range(0, len(magnet_links), self.batch_size):
+            batch = magnet_links[start:start + self.batch_size]
+            try:
+                with METRICS.timer('submit', backend='webapi'):
+                    result = self.client.torrents_add(urls=batch, is_paused=self.paused)
+            except qbittorrentapi.APIError as e:
+                logger.error(f"Error adding {len(batch)} torrents via {self.host}: {e}")
+                METRICS.inc('magnets', len(batch), result='failed')
+                continue
+            if result == 'Fails.':
+                # Also returned when every magnet in the batch was already in the client
+                logger.warning(f"qBittorrent rejected a batch of {len(batch)} torrents")
+                METRICS.inc('magnets', len(batch), result='rejected')
+                continue
+            METRICS.inc('magnets', len(batch), result='submitted')
+            accepted.extend(batch)
+        return accepted
+
+    def load(self) -> Tuple[int, int]:
+        """Incomplete torrents and bytes left to download on this instance."""
+        torrents = self.client.torrents_info(status_filter='downloading')
+        return len(torrents), sum(torrent.get('amount_left', 0) for torrent in torrents)
+
+
+class FleetSubmitter:
+    """Spreads magnets over several qBittorrent instances, least loaded first.
+
+    Every instance is asked for its load in parallel at most once per load_ttl seconds;
+    in between, the cached counts are bumped locally as magnets are placed. Magnets are
+    dealt one at a time to the instance with the fewest incomplete torrents, breaking
+    ties by the fewest bytes left, and each instance gets one batched call.
+    """
+
+    batched = True
+
+    def __init__(self, submitters: Sequence[WebApiSubmitter], load_ttl: float = 60.0):
+        self.submitters = list(submitters)
+        self.load_ttl = load_ttl
+        self.executor = ThreadPoolExecutor(max_workers=len(self.submitters))
+        # [incomplete count, bytes left, instance] of each reachable instance
+        self.loads: List[List[int]] = []
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def _load(self, submitter: WebApiSubmitter):
+        try:
+            return submitter.load()
+        except Exception as e:
+            logger.error(f"Could not read load of {submitter.host}: {e}")
+            return None
+
+    def _reachable(self) -> List[List[int]]:
+        """Cached loads, re-read when older than load_ttl or when no instance answered last time."""
+        if not self.loads or time.monotonic() - self.loaded_at >= self.load_ttl:
+            loads = list(self.executor.map(self._load, self.submitters))
+            self.loads = [[load[0], load[1], i] for i, load in enumerate(loads) if load is not None]
+            self.loaded_at = time.monotonic()
+        return self.loads
+
+    def submit(self, magnet_links: List[str]) -> List[str]:
+        groups = [[] for _ in self.submitters]
+        with self.lock:
+            reachable = self._reachable()
+            if not reachable:
+                logger.error(f"No qBittorrent instance reachable for {len(magnet_links)} torrents")
+                return []
+            # Magnets carry no size, so only the count can be updated until the next load
+            for magnet_link in magnet_links:
+                target = min(reachable)
+                groups[target[2]].append(magnet_link)
+                target[0] += 1
+
+        futures = [
+            self.executor.submit(submitter.submit, group)
+            for submitter, group in zip(self.submitters, groups) if group
+        ]
+        accepted = []
+        for future in futures:
+            accepted.extend(future.result())
+        return accepted
+
+    def close(self) -> None:
+        """Join the per-instance worker threads."""
+        self.executor.shutdown()
+
+
+class SubprocessSubmitter:
+    """Fallback that launches the qbittorrent executable once per magnet."""
+
+    batched = False
+
+    @staticmethod
+    def command(magnet_link: str) -> List[str]:
+        return ['qbittorrent', '--skip-dialog=true', '--add-paused=true', magnet_link]
+
+    def submit(self, magnet_links: List[str]) -> List[str]:
+        accepted = []
+        for magnet_link in magnet_links:
+            try:
+                with METRICS.timer('submit', backend='subprocess'):
+                    subprocess.run(self.command(magnet_link), check=True)
+                accepted.append(magnet_link)
+                METRICS.inc('magnets', result='submitted')
+                logger.info(f"Started download for: {magnet_link}")
+            except (subprocess.CalledProcessError, OSError) as e:
+                logger.error(f"Error downloading {magnet_link}: {e}")
+                METRICS.inc('magnets', result='failed')
+        return accepted
+
+    async def submit_async(self, magnet_links: List[str]) -> List[str]:
+        """Like submit, but launches the processes without blocking the event loop."""
+        accepted = []
+        for magnet_link in magnet_links:
+            try:
+                with METRICS.timer('submit', backend='subprocess'):
+                    process = await asyncio.create_subprocess_exec(*self.command(magnet_link))
+                    returncode = await process.wait()
+            except OSError as e:
+                logger.error(f"Error downloading {magnet_link}: {e}")
+                METRICS.inc('magnets', result='failed')
+                continue
+            if returncode != 0:
+                logger.error(f"Error downloading {magnet_link}: qbittorrent exited with status {returncode}")
+                METRICS.inc('magnets', result='failed')
+                continue
+            METRICS.inc('magnets', result='submitted')
+            accepted.append(magnet_link)
+            logger.info(f"Started download for: {magnet_link}")
+        return accepted
+
+
+class SubmissionBuffer:
+    """Thread-safe buffer that hands magnets to a submitter in batches.
+
+    Scraper workers call add() as records are parsed; a batch is submitted whenever
+    batch_size magnets are pending, and flush() submits the remainder at the end.
+    Accepted magnets are marked in index (a torrent_index.TorrentIndex), when given, so
+    download-from-csv.py --index does not submit them again.
+    """
+
+    def __init__(self, submitter, batch_size: int = 100, index=None):
+        self.submitter = submitter
+        self.index = index
+        self.batch_size = batch_size if submitter.batched else 1
+        self.pending = []
+        self.submitted = 0
+        self.lock = threading.Lock()
+
+    def add(self, magnet_link: str) -> None:
+        with self.lock:
+            self.pending.append(magnet_link)
+            if len(self.pending) < self.batch_size:
+                return
+            batch, self.pending = self.pending, []
+        self._submit(batch)
+
+    def flush(self) -> None:
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if batch:
+            self._submit(batch)
+
+    def close(self) -> None:
+        """Submit the remainder and release the submitter's worker threads, if it has any."""
+        self.flush()
+        if hasattr(self.submitter, 'close'):
+            self.submitter.close()
+
+    def _submit(self, batch: List[str]) -> None:
+        accepted = self.submitter.submit(batch)
+        if self.index and accepted:
+            self.index.mark_submitted(accepted)
+        with self.lock:
+            self.submitted += len(accepted)
+        logger.info(f"Submitted {len(accepted)}/{len(batch)} torrents to qBittorrent")
+
+
+def make_submitter(backend: str, hosts: Sequence[str], username: str, password: str):
+    """Build the submitter for a --download-backend choice and one or more hosts."""
+    if backend == 'subprocess':
+        return SubprocessSubmitter()
+    submitters = [
+        WebApiSubmitter(host=host, username=user, password=secret)
+        for host, user, secret in (parse_host(spec, username, password) for spec in hosts)
+    ]
+    return submitters[0] if len(submitters) == 1 else FleetSubmitter(submitters)
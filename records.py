@@ -0,0 +1,314 @@
+import math
+import re
+import time
+import calendar
+import threading
+from array import array
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from torrent_index import parse_infohash
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+SIZE = re.compile(r'([\d.,]+)\s*(bytes|B|KB|MB|GB|TB|PB)\b', re.I)
+SIZE_UNITS = {'bytes': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4, 'pb': 1024 ** 5}
+RELATIVE_DATE = re.compile(r'(\d+|an?|one)\s+(second|minute|hour|day|week|month|year)s?\s+ago', re.I)
+ABSOLUTE_DATE = re.compile(r"([A-Za-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+'?(\d{2}|\d{4})\b")
+UNIT_SECONDS = {
+    'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400,
+    'week': 7 * 86400, 'month': 30 * 86400, 'year': 365 * 86400,
+}
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+
+# Column order of the CSV files written by main.py
+CSV_FIELDNAMES = [
+    'Category',
+    'Type',
+    'Language',
+    'Size',
+    'Uploaded By',
+    'Downloads',
+    'Last Checked',
+    'Date Uploaded',
+    'Seeders',
+    'Leechers',
+    'Magnet Link'
+]
+
+
+def parse_size(text: str) -> Optional[int]:
+    """'1.4 GB' -> bytes, using the binary units 1337x and qBittorrent display."""
+    match = SIZE.search(text or '')
+    if not match:
+        return None
+    return int(float(match.group(1).replace(',', '')) * SIZE_UNITS[match.group(2).lower()])
+
+
+def format_size(size_bytes: Optional[int]) -> str:
+    if size_bytes is None:
+        return 'N/A'
+    size = float(size_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def parse_count(text: str) -> int:
+    """'2,345' -> 2345; anything unparseable counts as 0."""
+    digits = (text or '').replace(',', '').strip()
+    return int(digits) if digits.isdigit() else 0
+
+
+def format_date(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return 'N/A'
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_date(text: str, reference: Optional[float] = None) -> Optional[float]:
+    """Parse "2 hours ago", "Yesterday", "Jan. 5th '24" or an ISO date into a UTC epoch timestamp.
+
+    Relative dates are resolved against reference, the time the page was scraped.
+    """
+    text = (text or '').strip()
+    reference = time.time() if reference is None else reference
+    try:
+        parsed = datetime.fromisoformat(text)
+        return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+    except ValueError:
+        pass
+    match = RELATIVE_DATE.search(text)
+    if match:
+        amount = match.group(1).lower()
+        count = 1 if amount in ('a', 'an', 'one') else int(amount)
+        return reference - count * UNIT_SECONDS[match.group(2).lower()]
+    lowered = text.lower()
+    if lowered in ('just now', 'today'):
+        return reference
+    if lowered == 'yesterday':
+        return reference - UNIT_SECONDS['day']
+    match = ABSOLUTE_DATE.search(text)
+    if match and match.group(1).lower() in MONTHS:
+        year = int(match.group(3))
+        year = year + 2000 if year < 100 else year
+        try:
+            return float(calendar.timegm((year, MONTHS[match.group(1).lower()], int(match.group(2)), 0, 0, 0)))
+        except ValueError:
+            return None
+    return None
+
+
+class TorrentRecord:
+    """One scraped torrent with normalized, typed fields.
+
+    Sizes are bytes, counts are ints and dates are UTC epoch seconds (None when the
+    site's text could not be parsed), so results can be filtered and sorted without
+    re-parsing display strings.
+    """
+
+    __slots__ = (
+        'category', 'type', 'language', 'size_bytes', 'uploaded_by', 'downloads',
+        'checked_at', 'uploaded_at', 'seeders', 'leechers', 'magnet_link', 'infohash', 'name',
+    )
+
+    def __init__(self, category, type, language, size_bytes, uploaded_by, downloads,
+                 checked_at, uploaded_at, seeders, leechers, magnet_link, infohash=None, name=None):
+        self.category = category
+        self.type = type
+        self.language = language
+        self.size_bytes = size_bytes
+        self.uploaded_by = uploaded_by
+        self.downloads = downloads
+        self.checked_at = checked_at
+        self.uploaded_at = uploaded_at
+        self.seeders = seeders
+        self.leechers = leechers
+        self.magnet_link = magnet_link
+        self.infohash = infohash if infohash is not None else parse_infohash(magnet_link)
+        self.name = name
+
+    @property
+    def size(self) -> str:
+        return format_size(self.size_bytes)
+
+    def to_csv_row(self) -> List:
+        """Row in CSV_FIELDNAMES order, with dates written as UTC ISO timestamps."""
+        return [
+            self.category, self.type, self.language, self.size, self.uploaded_by, self.downloads,
+            format_date(self.checked_at), format_date(self.uploaded_at), self.seeders, self.leechers,
+            self.magnet_link,
+        ]
+
+    @classmethod
+    def from_info(cls, info: Dict, reference: Optional[float] = None) -> 'TorrentRecord':
+        """Build a record from a scraper info dict; relative dates resolve against reference."""
+        return cls(
+            category=info['category'],
+            type=info['type'],
+            language=info['language'],
+            size_bytes=parse_size(info['size']),
+            uploaded_by=info['uploaded_by'],
+            downloads=parse_count(info['downloads']),
+            checked_at=parse_date(info['last_checked'], reference),
+            uploaded_at=parse_date(info['date_uploaded'], reference),
+            seeders=parse_count(info['seeders']),
+            leechers=parse_count(info['leechers']),
+            magnet_link=info['magnet_link'],
+            name=info.get('name'),
+        )
+
+    @classmethod
+    def from_csv_row(cls, row: List[str], reference: Optional[float] = None) -> 'TorrentRecord':
+        """Build a record from a row in main.py's CSV column order."""
+        return cls(
+            category=row[0],
+            type=row[1],
+            language=row[2],
+            size_bytes=parse_size(row[3]),
+            uploaded_by=row[4],
+            downloads=parse_count(row[5]),
+            checked_at=parse_date(row[6], reference),
+            uploaded_at=parse_date(row[7], reference),
+            seeders=parse_count(row[8]),
+            leechers=parse_count(row[9]),
+            magnet_link=row[10],
+        )
+
+
+# One row of a search results page, typed like TorrentRecord; fields the listing did
+# not show are None
+Listing = namedtuple('Listing', ['url', 'name', 'category', 'seeders', 'leechers', 'size_bytes',
+                                 'uploaded_at', 'uploaded_by'])
+
+
+class ListingFilter:
+    """Scrape-time filters checked against search listings before detail pages are fetched.
+
+    A listing passes a condition it has no value for, so nothing is dropped on a guess;
+    the same conditions are checked again against the scraped TorrentRecord.
+    """
+
+    def __init__(self, min_seeders: Optional[int] = None, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, uploader: Optional[str] = None,
+                 category: Optional[str] = None):
+        self.min_seeders = min_seeders
+        self.min_size = min_size
+        self.max_size = max_size
+        self.uploader = uploader.lower() if uploader else None
+        self.category = category.lower() if category else None
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in (
+            self.min_seeders, self.min_size, self.max_size, self.uploader, self.category))
+
+    def key(self) -> str:
+        """Stable text form of the active conditions, e.g. for remembering what they rejected."""
+        conditions = (('min_seeders', self.min_seeders), ('min_size', self.min_size), ('max_size', self.max_size),
+                      ('uploader', self.uploader), ('category', self.category))
+        return ';'.join(f'{name}={value}' for name, value in conditions if value is not None)
+
+    def matches(self, row) -> bool:
+        """True unless a known field of row (a Listing or TorrentRecord) fails a condition."""
+        if self.min_seeders is not None and row.seeders is not None and row.seeders < self.min_seeders:
+            return False
+        if row.size_bytes is not None:
+            if self.min_size is not None and row.size_bytes < self.min_size:
+                return False
+            if self.max_size is not None and row.size_bytes > self.max_size:
+                return False
+        # Detail pages say N/A for fields they do not show
+        if self.uploader and row.uploaded_by not in (None, 'N/A') and row.uploaded_by.lower() != self.uploader:
+            return False
+        if self.category and row.category not in (None, 'N/A') and row.category.lower() != self.category:
+            return False
+        return True
+
+    def accept(self, row) -> bool:
+        """matches(), counting rejected rows."""
+        if self.matches(row):
+            return True
+        with self._lock:
+            self.rejected += 1
+        return False
+
+
+class RecordColumns:
+    """Column-oriented store for many TorrentRecords.
+
+    Numbers live in typed arrays (missing sizes are -1, missing dates NaN) rather than
+    one object per row, and to_arrow() hands the columns to Arrow for vectorized
+    filtering, sorting and Parquet export.
+    """
+
+    STRING_FIELDS = ('name', 'category', 'type', 'language', 'uploaded_by', 'magnet_link', 'infohash')
+    INT_FIELDS = ('size_bytes', 'downloads', 'seeders', 'leechers')
+    DATE_FIELDS = ('checked_at', 'uploaded_at')
+
+    def __init__(self):
+        self.columns = {}
+        for field in self.STRING_FIELDS:
+            self.columns[field] = []
+        for field in self.INT_FIELDS:
+            self.columns[field] = array('q')
+        for field in self.DATE_FIELDS:
+            self.columns[field] = array('d')
+
+    def __len__(self) -> int:
+        return len(self.columns['magnet_link'])
+
+    def append(self, record: TorrentRecord) -> None:
+        for field in self.STRING_FIELDS:
+            self.columns[field].append(getattr(record, field))
+        for field in self.INT_FIELDS:
+            value = getattr(record, field)
+            self.columns[field].append(-1 if value is None else value)
+        for field in self.DATE_FIELDS:
+            value = getattr(record, field)
+            self.columns[field].append(math.nan if value is None else value)
+
+    def extend(self, records) -> None:
+        for record in records:
+            self.append(record)
+
+    def __iter__(self) -> Iterator[TorrentRecord]:
+        for i in range(len(self)):
+            values = {field: column[i] for field, column in self.columns.items()}
+            if values['size_bytes'] < 0:
+                values['size_bytes'] = None
+            for field in self.DATE_FIELDS:
+                if math.isnan(values[field]):
+                    values[field] = None
+            yield TorrentRecord(**values)
+
+    def to_arrow(self):
+        """Return the columns as a pyarrow Table with nullable, typed columns."""
+        require_pyarrow()
+        arrays = {}
+        for field in self.STRING_FIELDS:
+            arrays[field] = pyarrow.array(self.columns[field], type=pyarrow.string())
+        for field in self.INT_FIELDS:
+            values = pyarrow.array(self.columns[field], type=pyarrow.int64())
+            arrays[field] = values if field != 'size_bytes' else pyarrow.compute.if_else(
+                pyarrow.compute.less(values, 0), None, values)
+        for field in self.DATE_FIELDS:
+            seconds = pyarrow.array(self.columns[field], type=pyarrow.float64(), from_pandas=True)
+            arrays[field] = pyarrow.compute.cast(seconds, pyarrow.int64(), safe=False).cast(pyarrow.timestamp('s', tz='UTC'))
+        return pyarrow.table(arrays)
+
+    def write_parquet(self, path: str) -> None:
+        pyarrow.parquet.write_table(self.to_arrow(), path, compression='zstd')
+
+
+def require_pyarrow() -> None:
+    if pyarrow is None:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
@@ -0,0 +1,37 @@
+"""Incremental crawls against the local fixture server, sharing one TorrentIndex between runs."""
+from benchmark import FixtureServer, FixtureSite, TimedTorrent1337x
+from main import incremental_scrape_torrent_links
+from records import ListingFilter
+from torrent_index import TorrentIndex
+
+
+def crawl(server, index, filters=None):
+    """One incremental run, recording its output in index like main.py does."""
+    results = incremental_scrape_torrent_links(TimedTorrent1337x(server.url), 'ubuntu', index=index,
+                                               filters=filters)
+    index.add_torrents((info['url'], info['magnet_link']) for info in results)
+    return {info['url'] for info in results}
+
+
+def test_filtered_rejects_are_fetched_by_unfiltered_runs(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    # Detail pages report torrent_id % 500 seeders, so IDs below 10 fail only after fetching
+    with FixtureServer(FixtureSite(total_pages=3, rows_per_page=6)) as server:
+        filtered = crawl(server, index, ListingFilter(min_seeders=10))
+        unfiltered = crawl(server, index)
+    index.close()
+
+    assert filtered
+    assert not filtered & unfiltered
+    assert len(filtered | unfiltered) == 18
+    assert any(url.split('/')[4] in {'6', '7', '8', '9'} for url in unfiltered)
+
+
+def test_rerun_with_same_filters_stops_at_rejects(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.db'))
+    with FixtureServer(FixtureSite(total_pages=3, rows_per_page=6)) as server:
+        crawl(server, index, ListingFilter(min_seeders=10))
+        before = server.requests
+        assert crawl(server, index, ListingFilter(min_seeders=10)) == set()
+        assert server.requests - before == 1
+    index.close()
@@ -0,0 +1,79 @@
+"""Check that every HTML parser backend reads the recorded 1337x pages in fixtures/ the same way."""
+import pytest
+
+from benchmark import load_fixture
+from main import PARSERS, Torrent1337x
+from records import Listing
+
+MAGNET = ('magnet:?xt=urn:btih:3B245504CF5F11BBDBE1201CEA6A6BF45AEE1BC0'
+          '&dn=ubuntu-24.04.1-desktop-amd64.iso&tr=https%3A%2F%2Ftorrent.ubuntu.com%2Fannounce')
+
+EXPECTED_LISTINGS = [
+    Listing(
+        url='https://www.1337x.to/torrent/5118311/Ubuntu-24-04-1-Desktop-amd64/',
+        name='Ubuntu 24.04.1 Desktop amd64', category='Apps', seeders=2345, leechers=112,
+        size_bytes=6120328396, uploaded_at=1724889600.0, uploaded_by='LinuxReleases',
+    ),
+    Listing(
+        url='https://www.1337x.to/torrent/5102277/Ubuntu-24-04-Server-amd64/',
+        name='Ubuntu 24.04 Server amd64', category='Apps', seeders=1204, leechers=37,
+        size_bytes=2791728742, uploaded_at=1714003200.0, uploaded_by='LinuxReleases',
+    ),
+    Listing(
+        url='https://www.1337x.to/torrent/4988120/The-Ubuntu-Handbook-2nd-Edition-EPUB/',
+        name='The Ubuntu Handbook 2nd Edition EPUB', category='Other', seeders=48, leechers=5,
+        size_bytes=13002342, uploaded_at=1696291200.0, uploaded_by='bookworm',
+    ),
+    # Unknown category icon and a time-only upload date
+    Listing(
+        url='https://www.1337x.to/torrent/4870531/Ubuntu-Story-2023-1080p-WEBRip-x264/',
+        name='Ubuntu Story (2023) 1080p WEBRip x264', category=None, seeders=3, leechers=0,
+        size_bytes=1503238553, uploaded_at=None, uploaded_by='filmnerd',
+    ),
+]
+
+EXPECTED_INFO = {
+    'name': 'Ubuntu 24.04.1 Desktop amd64',
+    'category': 'Apps',
+    'type': 'UNIX',
+    'language': 'English',
+    'size': '5.7 GB',
+    'uploaded_by': 'LinuxReleases',
+    'downloads': '18,407',
+    'last_checked': '2 hours ago',
+    'date_uploaded': '1 year ago',
+    'seeders': '2345',
+    'leechers': '112',
+    'magnet_link': MAGNET,
+}
+
+
+def make_site(parser):
+    if parser == 'lxml':
+        pytest.importorskip('lxml')
+    return Torrent1337x(parser=parser)
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_parse_listings(parser):
+    site = make_site(parser)
+    soup = site.make_soup(load_fixture('search_page.html'))
+    assert site.parse_listings(soup) == EXPECTED_LISTINGS
+    assert site.get_total_pages(soup) == 12
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_extract_torrent_info(parser):
+    site = make_site(parser)
+    soup = site.make_soup(load_fixture('torrent_page.html'))
+    assert site.extract_torrent_info(soup, MAGNET) == EXPECTED_INFO
+    assert site.parse_torrent_page(soup) == EXPECTED_INFO
+
+
+def test_parsers_agree():
+    sites = [make_site(parser) for parser in PARSERS]
+    for name, parse in (('search_page.html', 'parse_listings'), ('torrent_page.html', 'parse_torrent_page')):
+        html = load_fixture(name)
+        first, *rest = [getattr(site, parse)(site.make_soup(html)) for site in sites]
+        for other in rest:
+            assert other == first
@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+import logging
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean the site wants us to slow down
+THROTTLE_STATUSES = [429, 503]
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket capping the request rate across all workers.
+
+    Tokens are reserved up front, so concurrent callers queue up behind each other
+    instead of all waking at once when the bucket refills.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given time, e.g. to honour Retry-After."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class AdaptiveThrottle:
+    """Shared request throttle: optional token bucket plus an AIMD concurrency limit.
+
+    The number of requests allowed in flight grows by roughly one per round of healthy
+    responses and is halved when the site answers 429/503, a request fails, or the
+    smoothed latency rises above latency_target. With adaptive=False the limit stays at
+    max_concurrency and only the rate cap applies.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        adaptive: bool = True,
+        initial_concurrency: int = 2,
+        min_concurrency: int = 1,
+        max_concurrency: int = 20,
+        latency_target: float = 2.0
+    ):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.adaptive = adaptive
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency)
+                           if adaptive else max_concurrency)
+        self.latency_target = latency_target
+        self.latency = None
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()
+
+    def acquire(self) -> None:
+        if self.bucket:
+            self.bucket.acquire()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        if self.bucket:
+            await self.bucket.acquire_async()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, status: Optional[int], latency: float) -> None:
+        """Return a slot and feed the response status (None on failure) to the controller."""
+        with self._cond:
+            self.in_flight -= 1
+            self.requests += 1
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self._decrease()
+            elif status is None:
+                self.errors += 1
+                self._decrease()
+            else:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                if self.latency > self.latency_target:
+                    self._decrease()
+                else:
+                    self._increase()
+            self._wake()
+
+    def pause(self, seconds: float) -> None:
+        if self.bucket:
+            self.bucket.pause(seconds)
+        else:
+            time.sleep(seconds)
+
+    async def pause_async(self, seconds: float) -> None:
+        if self.bucket:
+            self.bucket.pause(seconds)
+        else:
+            await asyncio.sleep(seconds)
+
+    def _increase(self) -> None:
+        if not self.adaptive or self.limit >= self.max_concurrency:
+            return
+        before = int(self.limit)
+        self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+        if int(self.limit) > before:
+            self.increases += 1
+
+    def _decrease(self) -> None:
+        # Responses already in flight reflect the old limit, so back off at most once per window
+        now = time.monotonic()
+        if not self.adaptive or now - self._last_decrease < self.latency_target:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        self.decreases += 1
+        logger.info(f"Backing off: concurrency limit is now {int(self.limit)}")
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        if free <= 0:
+            return
+        self._cond.notify(free)
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(_resolve, waiter)
+            free -= 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'concurrency_limit': int(self.limit),
+            'rate_limit': self.bucket.rate if self.bucket else 0,
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'errors': self.errors,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'latency_ewma': round(self.latency or 0.0, 3),
+        }
+
+
+def _resolve(waiter) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
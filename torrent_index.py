@@ -0,0 +1,150 @@
+import base64
+import re
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BTIH = re.compile(r'xt=urn:btih:([0-9a-zA-Z]+)')
+TORRENT_ID = re.compile(r'/torrent/(\d+)/')
+
+
+def parse_infohash(magnet_link: str) -> Optional[str]:
+    """Return the lowercase hex infohash of a magnet link, decoding base32 hashes."""
+    match = BTIH.search(magnet_link or '')
+    if not match:
+        return None
+    value = match.group(1)
+    if len(value) == 40:
+        return value.lower()
+    if len(value) == 32:
+        try:
+            return base64.b32decode(value.upper()).hex()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_torrent_id(url: str) -> Optional[str]:
+    """Return the numeric torrent ID from a detail page URL."""
+    match = TORRENT_ID.search(url or '')
+    return match.group(1) if match else None
+
+
+def torrent_key(url: str) -> str:
+    # Sites without numeric IDs in their URLs are keyed by the URL itself
+    return parse_torrent_id(url) or url
+
+
+class TorrentIndex:
+    """Persistent index of torrents already scraped and magnets already submitted.
+
+    Scraped torrents are keyed by the detail page's numeric ID, so the scraper can skip a
+    detail fetch before it happens. Submitted magnets are keyed by infohash, so the same
+    torrent is never added to qBittorrent twice, whichever query or tracker found it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS scraped ('
+            'torrent_id TEXT PRIMARY KEY, infohash TEXT, seen_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS scraped_infohash ON scraped (infohash)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS submitted (infohash TEXT PRIMARY KEY, submitted_at REAL NOT NULL)'
+        )
+        # Torrents fetched but dropped by a set of scrape filters; only incremental crawls with
+        # the same filters read these, so every other crawl still fetches them
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS rejected ('
+            'torrent_id TEXT NOT NULL, filters TEXT NOT NULL, seen_at REAL NOT NULL, '
+            'PRIMARY KEY (torrent_id, filters))'
+        )
+        self.conn.commit()
+
+    def has_torrent(self, url: str) -> bool:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM scraped WHERE torrent_id = ?', (torrent_key(url),)
+            ).fetchone()
+        return row is not None
+
+    def seen_at(self, urls: Iterable[str]) -> Dict[str, float]:
+        """Map each already scraped detail URL to when it was last scraped."""
+        keys = {torrent_key(url): url for url in urls}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT torrent_id, seen_at FROM scraped WHERE torrent_id IN ({placeholders})', list(keys)
+            ).fetchall()
+        return {keys[torrent_id]: seen_at for torrent_id, seen_at in rows}
+
+    def add_torrents(self, torrents: Iterable[Tuple[str, str]]) -> None:
+        """Record (detail URL, magnet link) pairs as scraped."""
+        now = time.time()
+        rows = [(torrent_key(url), parse_infohash(magnet_link), now) for url, magnet_link in torrents if url]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO scraped (torrent_id, infohash, seen_at) VALUES (?, ?, ?)', rows
+            )
+            self.conn.commit()
+
+    def rejected_at(self, urls: Iterable[str], filters: str) -> Dict[str, float]:
+        """Map each detail URL last rejected under filters (a ListingFilter.key()) to when."""
+        keys = {torrent_key(url): url for url in urls}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT torrent_id, seen_at FROM rejected WHERE filters = ? AND torrent_id IN ({placeholders})',
+                [filters] + list(keys)
+            ).fetchall()
+        return {keys[torrent_id]: seen_at for torrent_id, seen_at in rows}
+
+    def add_rejected(self, urls: Iterable[str], filters: str) -> None:
+        """Record detail URLs whose scraped pages failed filters (a ListingFilter.key())."""
+        now = time.time()
+        rows = [(torrent_key(url), filters, now) for url in urls if url]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO rejected (torrent_id, filters, seen_at) VALUES (?, ?, ?)', rows
+            )
+            self.conn.commit()
+
+    def has_submitted(self, magnet_link: str) -> bool:
+        infohash = parse_infohash(magnet_link)
+        if not infohash:
+            return False
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM submitted WHERE infohash = ?', (infohash,)).fetchone()
+        return row is not None
+
+    def mark_submitted(self, magnet_links: Iterable[str]) -> None:
+        now = time.time()
+        rows = [(infohash, now) for infohash in map(parse_infohash, magnet_links) if infohash]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO submitted (infohash, submitted_at) VALUES (?, ?)', rows
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()